@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication, QLabel, QComboBox, QMessageBox,
@@ -9,6 +10,7 @@ from PyQt6.QtGui import QPixmap, QIcon, QEnterEvent
 
 # Business/Logic
 from services.ProcessamentoAgitel import ProcessadorAgitel
+from services.ProcessamentoLoteAgitel import ProcessadorLoteAgitel
 from services.AutomacaoColeta import Blume
 
 # UI/Interface
@@ -17,6 +19,7 @@ from qt_ui.IAutomacaoColeta import PainelAutomacaoColeta
 from qt_ui.IMesclaPlanilhas import PainelMesclaPlanilha
 from qt_ui.IOrganizacaoPastas import PainelOrganizacaoPastas
 from qt_ui.IProcessamentoAgitel import PainelProcessamentoAgitel
+from qt_ui.IConsultaAgitel import PainelConsultaAgitel
 from qt_ui.ISubstituicaoSimples import PainelSubstituicaoSimples
 from qt_ui.IOrganizacaoSicoob import PainelOrganizacaoSicoob
 from qt_ui.IPreenchimentoContrato import PainelPreenchimentoContrato
@@ -194,12 +197,14 @@ class MainApp(ResizableWindow):
         self.automacao_coleta = PainelAutomacaoColeta()
         self.organizacao_pastas = PainelOrganizacaoPastas()
         self.processamento_agitel = PainelProcessamentoAgitel()
+        self.consulta_agitel = PainelConsultaAgitel()
         self.painel_mesclagem = PainelMesclaPlanilha()
         self.substituicao_simples = PainelSubstituicaoSimples()
         self.organizador_sicoob = PainelOrganizacaoSicoob()
         self.preenchimento_contrato = PainelPreenchimentoContrato()
 
         self.processamento_agitel.processStarted.connect(self._iniciar_processamento_agitel)
+        self.processamento_agitel.processCancelled.connect(self._cancelar_processamento_agitel)
 
         self.stacked_content.addWidget(self.home_screen)
         self.stacked_content.addWidget(self.automacao_coleta)
@@ -209,21 +214,55 @@ class MainApp(ResizableWindow):
         self.stacked_content.addWidget(self.substituicao_simples)
         self.stacked_content.addWidget(self.organizador_sicoob)
         #self.stacked_content.addWidget(self.preenchimento_contrato)
+        self.function_groupsping["Consulta Agitel"] = self.stacked_content.addWidget(self.consulta_agitel)
 
         self.layout.addWidget(self.central_content, stretch=1)
 
     def _iniciar_processamento_agitel(self):
         file_path = self.processamento_agitel.get_file_path()
         equalize = self.processamento_agitel.get_equalize_option()
+        workers = self.processamento_agitel.get_workers_option()
+        conversion_mode = self.processamento_agitel.get_conversion_mode()
+        use_cache = self.processamento_agitel.get_cache_option()
+        output_format = self.processamento_agitel.get_output_format()
+        summary = self.processamento_agitel.get_summary_option()
+        memory_budget_mb = self.processamento_agitel.get_memory_budget()
+        spill_backend = self.processamento_agitel.get_spill_backend()
+        deduplicate = self.processamento_agitel.get_dedup_option()
+        dedup_path = self.processamento_agitel.get_dedup_path()
+        store_path = self.processamento_agitel.get_store_path()
+        tariff_path = self.processamento_agitel.get_tariff_path()
+        checkpoint = self.processamento_agitel.get_checkpoint_option()
 
         if not file_path:
             QMessageBox.warning(self, "Aviso", "Selecione um arquivo Excel.")
             return
 
-        self.controller_agitel = ProcessadorAgitel(
-            file_path=file_path,
-            equalize=equalize
+        options = dict(
+            equalize=equalize,
+            workers=workers,
+            conversion_mode=conversion_mode,
+            use_cache=use_cache,
+            output_format=output_format,
+            summary=summary,
+            memory_budget_mb=memory_budget_mb,
+            spill_backend=spill_backend,
+            deduplicate=deduplicate,
+            dedup_path=dedup_path,
+            store_path=store_path,
+            tariff_path=tariff_path,
+            checkpoint=checkpoint
         )
+        if self.processamento_agitel.is_folder_mode():
+            self.controller_agitel = ProcessadorLoteAgitel(
+                folder_path=file_path,
+                combine=self.processamento_agitel.get_combine_option(),
+                **options
+            )
+            self.controller_agitel.fileProgress.connect(self.processamento_agitel.update_file_progress)
+        else:
+            self.controller_agitel = ProcessadorAgitel(file_path=file_path, **options)
+            self.controller_agitel.metricsUpdated.connect(self.processamento_agitel.update_metrics)
 
         self.controller_agitel.progressUpdated.connect(self.processamento_agitel.update_progress)
         self.controller_agitel.processFinished.connect(self.processamento_agitel.on_process_finished)
@@ -233,6 +272,10 @@ class MainApp(ResizableWindow):
         self.controller_agitel.start()
         self.processamento_agitel.set_processing_state(True)
 
+    def _cancelar_processamento_agitel(self):
+        if getattr(self, 'controller_agitel', None) and self.controller_agitel.isRunning():
+            self.controller_agitel.stop()
+
     def _setup_connections(self):
         self.funcionalidades_combo.currentTextChanged.connect(self.on_combo_text_changed)
         self.home_screen.boxes_clicked.connect(self.on_boxes_clicked)
@@ -245,7 +288,7 @@ class MainApp(ResizableWindow):
     def on_boxes_clicked(self, index):
         function_groups = {
             0: ["Automação da Coleta"],
-            1: ["Organização de Pastas", "Processamento Agitel",
+            1: ["Organização de Pastas", "Processamento Agitel", "Consulta Agitel",
                 "Mesclagem de Planilhas", "Substituição Simples"],
             2: ["Organizador (NF) Sicoob"],
             3: ["Preenchimento de contrato"]
@@ -279,6 +322,7 @@ class MainApp(ResizableWindow):
     def _finalize_ui_setup(self):
         self.theme_manager.register_widget(self.automacao_coleta)
         self.theme_manager.register_widget(self.processamento_agitel)
+        self.theme_manager.register_widget(self.consulta_agitel)
         self.theme_manager.register_widget(self.organizacao_pastas)
         self.theme_manager.register_widget(self.painel_mesclagem)
         self.theme_manager.register_widget(self.organizador_sicoob)
@@ -299,6 +343,7 @@ class MainApp(ResizableWindow):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     main_window = MainApp()
     main_window.show()
@@ -0,0 +1,248 @@
+import os
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit,
+    QFileDialog, QTextEdit, QCheckBox, QLabel, QHBoxLayout,
+    QComboBox, QDateEdit
+)
+from PyQt6.QtCore import QThread, QSettings, QDate, pyqtSlot
+from openpyxl.utils.datetime import from_excel
+from utils.sheetStyles import (
+    estilo_label_light, estilo_label_dark,
+    campo_qline_light, campo_qline_dark,
+    estilo_check_box_light, estilo_check_box_dark,
+    estilo_combo_box_light, estilo_combo_box_dark,
+    estilo_log_light, estilo_log_dark,
+    estilo_hover
+)
+from services.ConsultaAgitel import ExportacaoConsultaWorker
+from utils.callStore import BaseChamadas
+from utils.outputSinks import SAIDAS
+
+TODAS_ORIGENS = "Todas"
+LINHAS_PREVIA = 20
+
+
+class PainelConsultaAgitel(QWidget):
+    """Consultas e exportações filtradas na base de chamadas gerada pelo Processamento Agitel."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.is_dark_mode = False
+        self.export_thread = None
+        self.export_worker = None
+        self.init_ui()
+
+    def init_ui(self):
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(15, 15, 15, 15)
+        self.layout().setSpacing(10)
+
+        self._create_filter_controls()
+        self._create_results_area()
+
+    def _create_filter_controls(self):
+        grid = QGridLayout()
+        grid.setVerticalSpacing(10)
+        grid.setHorizontalSpacing(15)
+        grid.setColumnStretch(1, 1)
+
+        self.label_store = QLabel("Base de consultas:")
+        self.text_store = QLineEdit()
+        self.text_store.setReadOnly(True)
+        self.btn_select_store = QPushButton("Selecionar Base")
+        self.btn_select_store.setFixedSize(160, 32)
+
+        self.label_origin = QLabel("Origem:")
+        self.combo_origin = QComboBox()
+        self.combo_origin.setEditable(True)
+        self.combo_origin.addItem(TODAS_ORIGENS)
+        self.combo_origin.setFixedWidth(160)
+
+        self.label_destination = QLabel("Destino começa com:")
+        self.text_destination = QLineEdit()
+        self.text_destination.setFixedWidth(160)
+
+        self.checkbox_period = QCheckBox("Período:")
+        self.date_start = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.date_end = QDateEdit(QDate.currentDate())
+        for date_edit in [self.date_start, self.date_end]:
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd/MM/yyyy")
+
+        self.label_output_format = QLabel("Formato:")
+        self.combo_output_format = QComboBox()
+        self.combo_output_format.addItems(list(SAIDAS))
+        self.combo_output_format.setFixedWidth(100)
+
+        self.btn_query = QPushButton("Consultar")
+        self.btn_query.setFixedSize(160, 32)
+        self.btn_export = QPushButton("Exportar")
+        self.btn_export.setFixedSize(160, 32)
+
+        grid.addWidget(self.label_store, 0, 0)
+        grid.addWidget(self.text_store, 0, 1)
+        grid.addWidget(self.btn_select_store, 0, 2)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.label_origin)
+        filter_layout.addWidget(self.combo_origin)
+        filter_layout.addSpacing(15)
+        filter_layout.addWidget(self.label_destination)
+        filter_layout.addWidget(self.text_destination)
+        filter_layout.addSpacing(15)
+        filter_layout.addWidget(self.checkbox_period)
+        filter_layout.addWidget(self.date_start)
+        filter_layout.addWidget(self.date_end)
+        filter_layout.addStretch()
+        grid.addLayout(filter_layout, 1, 0, 1, 3)
+
+        action_layout = QHBoxLayout()
+        action_layout.addWidget(self.label_output_format)
+        action_layout.addWidget(self.combo_output_format)
+        action_layout.addStretch()
+        action_layout.addWidget(self.btn_query)
+        action_layout.addWidget(self.btn_export)
+        grid.addLayout(action_layout, 2, 0, 1, 3)
+
+        self.btn_select_store.clicked.connect(self._select_store)
+        self.btn_query.clicked.connect(self._run_query)
+        self.btn_export.clicked.connect(self._run_export)
+
+        self.layout().addLayout(grid)
+
+    def _create_results_area(self):
+        self.text_results = QTextEdit()
+        self.text_results.setReadOnly(True)
+        self.text_results.setPlaceholderText("Resultados da consulta...")
+        self.layout().addWidget(self.text_results)
+
+    def apply_styles(self, is_dark_mode):
+        self.is_dark_mode = is_dark_mode
+        label_style = estilo_label_dark() if is_dark_mode else estilo_label_light()
+        line_style = campo_qline_dark() if is_dark_mode else campo_qline_light()
+        combo_style = estilo_combo_box_dark() if is_dark_mode else estilo_combo_box_light()
+
+        for label in [self.label_store, self.label_origin, self.label_destination, self.label_output_format]:
+            label.setStyleSheet(label_style)
+        for line_edit in [self.text_store, self.text_destination]:
+            line_edit.setStyleSheet(line_style)
+        for combo in [self.combo_origin, self.combo_output_format]:
+            combo.setStyleSheet(combo_style)
+        for date_edit in [self.date_start, self.date_end]:
+            date_edit.setStyleSheet(line_style.replace("QLineEdit", "QDateEdit"))
+        self.checkbox_period.setStyleSheet(estilo_check_box_dark() if is_dark_mode else estilo_check_box_light())
+        self.text_results.setStyleSheet(estilo_log_dark() if is_dark_mode else estilo_log_light())
+
+        for btn in [self.btn_select_store, self.btn_query, self.btn_export]:
+            estilo_hover(btn, is_dark_mode)
+
+    def _select_store(self):
+        settings = QSettings("LivreEscolha", "LE_Helper")
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Selecionar Base de Consultas", settings.value("last_open_dir", ""), "Base SQLite (*.db)"
+        )
+        if not path:
+            return
+        self.text_store.setText(path)
+        settings.setValue("last_open_dir", os.path.dirname(path))
+        try:
+            with BaseChamadas(path) as base:
+                origens = base.origens()
+                arquivos = base.arquivos()
+        except Exception as e:
+            self.append_log(f"⛔ Não foi possível abrir a base: {e}")
+            return
+
+        self.combo_origin.clear()
+        self.combo_origin.addItem(TODAS_ORIGENS)
+        self.combo_origin.addItems(origens)
+        self.append_log(f"📂 Base selecionada: {os.path.basename(path)} ({len(arquivos)} arquivos, {len(origens)} origens)")
+
+    def get_filters(self):
+        filtros = {}
+        origem = self.combo_origin.currentText().strip()
+        if origem and origem != TODAS_ORIGENS:
+            filtros['origem'] = origem
+        destino = self.text_destination.text().strip()
+        if destino:
+            filtros['destino'] = destino
+        if self.checkbox_period.isChecked():
+            filtros['inicio'] = self.date_start.date().toPyDate()
+            filtros['fim'] = self.date_end.date().toPyDate()
+        return filtros
+
+    def _open_store(self):
+        path = self.text_store.text()
+        if not path or not os.path.exists(path):
+            self.append_log("⚠️ Selecione uma base de consultas antes!")
+            return None
+        return BaseChamadas(path)
+
+    def _run_query(self):
+        try:
+            base = self._open_store()
+            if base is None:
+                return
+            with base:
+                filtros = self.get_filters()
+                chamadas, minutos, valor = base.totais(**filtros)
+                self.append_log(f"🔎 {chamadas} chamadas · {minutos:.1f} minutos · R$ {valor:.2f}".replace(".", ","))
+                for linha in base.consultar(limite=LINHAS_PREVIA, **filtros):
+                    self.append_log(self._format_preview(linha))
+        except Exception as e:
+            self.append_log(f"⛔ Erro na consulta: {e}")
+
+    @staticmethod
+    def _format_preview(linha):
+        data, origem, servico, regiao, destino, _, minutos, valor, arquivo = linha
+        if isinstance(data, (int, float)):
+            data = from_excel(data).strftime("%d/%m/%Y %H:%M")
+        return f"{data} | {origem} → {destino} | {servico} {regiao or ''} | {minutos} min | R$ {valor} | {arquivo}"
+
+    def _run_export(self):
+        store_path = self.text_store.text()
+        if not store_path or not os.path.exists(store_path):
+            self.append_log("⚠️ Selecione uma base de consultas antes!")
+            return
+        formato = self.combo_output_format.currentText()
+        extensao = SAIDAS[formato].extensao
+        sugestao = os.path.join(os.path.dirname(store_path), f"consulta_agitel{extensao}")
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar Consulta", sugestao, f"*{extensao}")
+        if not path:
+            return
+
+        self.export_thread = QThread()
+        self.export_worker = ExportacaoConsultaWorker(store_path, path, formato, self.get_filters())
+        self.export_worker.moveToThread(self.export_thread)
+        self.export_thread.started.connect(self.export_worker.executar)
+        self.export_worker.concluido.connect(self._export_finished)
+        self.export_worker.erro.connect(self._export_failed)
+
+        self._set_exporting(True)
+        self.export_thread.start()
+        self.append_log(f"⏳ Exportando para {os.path.basename(path)}...")
+
+    def _set_exporting(self, exporting):
+        for widget in [self.btn_select_store, self.btn_query, self.btn_export]:
+            widget.setEnabled(not exporting)
+
+    def _stop_export_thread(self):
+        self.export_thread.quit()
+        self.export_thread.wait()
+        self._set_exporting(False)
+
+    @pyqtSlot(int)
+    def _export_finished(self, total):
+        self._stop_export_thread()
+        self.append_log(f"✅ {total} chamadas exportadas para {os.path.basename(self.export_worker.caminho_saida)}")
+
+    @pyqtSlot(str)
+    def _export_failed(self, message):
+        self._stop_export_thread()
+        self.append_log(f"⛔ Erro ao exportar: {message}")
+
+    def append_log(self, message):
+        self.text_results.append(message)
+        self.text_results.verticalScrollBar().setValue(
+            self.text_results.verticalScrollBar().maximum()
+        )
@@ -4,7 +4,7 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit,
     QFileDialog, QProgressBar, QTableWidget, QTableWidgetItem,
     QLabel, QHBoxLayout, QHeaderView, QTextEdit,
-    QAbstractItemView, QDialog, QCheckBox, QScrollArea
+    QAbstractItemView, QDialog, QCheckBox, QScrollArea, QComboBox
 )
 from PyQt6.QtCore import QThread, pyqtSlot, QSettings
 from openpyxl.utils import get_column_letter
@@ -15,6 +15,8 @@ from utils.sheetStyles import (
     estilo_tabela_dark, estilo_tabela_light,
     estilo_progress_bar_light, estilo_progress_bar_dark,
     estilo_log_light, estilo_log_dark,
+    estilo_combo_box_light, estilo_combo_box_dark,
+    estilo_check_box_light, estilo_check_box_dark,
     estilo_hover
 )
 from services.MesclaPlanilhas import PlanilhaMesclagemWorker
@@ -62,6 +64,27 @@ class PainelMesclaPlanilha(QWidget):
         self.text_nome_saida = QLineEdit()
         self.text_nome_saida.setPlaceholderText("planilha_mesclada")
 
+        self.label_processos = QLabel("Processos paralelos:")
+        self.combo_processos = QComboBox()
+        self.combo_processos.addItems([str(n) for n in range(1, (os.cpu_count() or 1) + 1)])
+        self.combo_processos.setFixedWidth(80)
+
+        self.checkbox_alinhar = QCheckBox("Alinhar colunas pelo cabeçalho")
+        self.checkbox_alinhar.setToolTip(
+            "Localiza as colunas selecionadas pelo nome no cabeçalho de cada arquivo, "
+            "em vez da posição no arquivo base"
+        )
+        self.checkbox_unir = QCheckBox("Incluir colunas novas")
+        self.checkbox_unir.setToolTip("Acrescenta ao fim as colunas que aparecem nos arquivos e não estão no base")
+        self.checkbox_unir.setEnabled(False)
+        self.checkbox_alinhar.toggled.connect(self.checkbox_unir.setEnabled)
+
+        self.checkbox_incremental = QCheckBox("Mesclagem incremental")
+        self.checkbox_incremental.setToolTip(
+            "Reaproveita da saída anterior as linhas dos arquivos que não mudaram "
+            "(manifesto salvo ao lado da saída)"
+        )
+
         grid.addWidget(self.label_pasta, 0, 0)
         grid.addWidget(self.text_pasta, 0, 1)
         grid.addWidget(self.btn_selecionar_pasta, 0, 2)
@@ -73,6 +96,16 @@ class PainelMesclaPlanilha(QWidget):
         grid.addWidget(self.label_saida, 2, 0)
         grid.addWidget(self.text_nome_saida, 2, 1, 1, 1)
 
+        processos_layout = QHBoxLayout()
+        processos_layout.addWidget(self.label_processos)
+        processos_layout.addWidget(self.combo_processos)
+        processos_layout.addSpacing(15)
+        processos_layout.addWidget(self.checkbox_alinhar)
+        processos_layout.addWidget(self.checkbox_unir)
+        processos_layout.addWidget(self.checkbox_incremental)
+        processos_layout.addStretch()
+        grid.addLayout(processos_layout, 3, 0, 1, 3)
+
         self.layout().addLayout(grid)
 
     def _create_table(self):
@@ -123,8 +156,11 @@ class PainelMesclaPlanilha(QWidget):
         table_style = estilo_tabela_dark() if is_dark_mode else estilo_tabela_light()
         log_style = estilo_log_dark() if is_dark_mode else estilo_log_light()
 
-        for label in [self.label_pasta, self.label_base, self.label_saida]:
+        for label in [self.label_pasta, self.label_base, self.label_saida, self.label_processos]:
             label.setStyleSheet(label_style)
+        self.combo_processos.setStyleSheet(estilo_combo_box_dark() if is_dark_mode else estilo_combo_box_light())
+        for checkbox in [self.checkbox_alinhar, self.checkbox_unir, self.checkbox_incremental]:
+            checkbox.setStyleSheet(estilo_check_box_dark() if is_dark_mode else estilo_check_box_light())
             
         for line_edit in [self.text_pasta, self.text_arquivo_base, self.text_nome_saida]:
             line_edit.setStyleSheet(line_style)
@@ -210,7 +246,12 @@ class PainelMesclaPlanilha(QWidget):
             arquivos,
             self.text_pasta.text(),
             self.text_nome_saida.text() or "planilha_mesclada",
-            self.colunas_base
+            self.colunas_base,
+            workers=int(self.combo_processos.currentText()),
+            alinhar_cabecalho=self.checkbox_alinhar.isChecked(),
+            unir_colunas=self.checkbox_alinhar.isChecked() and self.checkbox_unir.isChecked(),
+            arquivo_base=self.text_arquivo_base.text() or None,
+            incremental=self.checkbox_incremental.isChecked()
         )
         
         self.worker.moveToThread(self.worker_thread)
@@ -223,6 +264,10 @@ class PainelMesclaPlanilha(QWidget):
         
         self.btn_mesclar.setEnabled(False)
         self.btn_cancelar.setEnabled(True)
+        self.combo_processos.setEnabled(False)
+        self.checkbox_alinhar.setEnabled(False)
+        self.checkbox_unir.setEnabled(False)
+        self.checkbox_incremental.setEnabled(False)
         self.worker_thread.start()
         self.append_log("⏳ Iniciando processo de mesclagem...")
 
@@ -246,6 +291,10 @@ class PainelMesclaPlanilha(QWidget):
         self.worker_thread.wait()
         self.btn_mesclar.setEnabled(True)
         self.btn_cancelar.setEnabled(False)
+        self.combo_processos.setEnabled(True)
+        self.checkbox_alinhar.setEnabled(True)
+        self.checkbox_unir.setEnabled(self.checkbox_alinhar.isChecked())
+        self.checkbox_incremental.setEnabled(True)
         self.append_log(f"✅ {mensagem}")
 
     @pyqtSlot(str)
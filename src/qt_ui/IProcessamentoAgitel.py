@@ -2,20 +2,23 @@ import os
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QGridLayout, QPushButton, QLineEdit,
     QFileDialog, QProgressBar, QTextEdit, QCheckBox,
-    QLabel, QHBoxLayout
+    QLabel, QHBoxLayout, QComboBox, QListWidget
 )
 from PyQt6.QtCore import pyqtSignal, pyqtSlot, QSettings, Qt
 from utils.sheetStyles import (
     estilo_label_light, estilo_label_dark,
     campo_qline_light, campo_qline_dark,
     estilo_check_box_light, estilo_check_box_dark,
+    estilo_combo_box_light, estilo_combo_box_dark,
     estilo_log_light, estilo_log_dark,
     estilo_progress_bar_light, estilo_progress_bar_dark,
     estilo_hover
 )
+from utils.outputSinks import SAIDAS
 
 class PainelProcessamentoAgitel(QWidget):
     processStarted = pyqtSignal()
+    processCancelled = pyqtSignal()
     processFinished = pyqtSignal(str)
     progressUpdated = pyqtSignal(int)
     errorOccurred = pyqtSignal(str)
@@ -47,22 +50,102 @@ class PainelProcessamentoAgitel(QWidget):
 
         self.btn_select_file = QPushButton("Selecionar Arquivo")
         self.btn_select_file.setFixedSize(160, 32)
+        self.btn_select_folder = QPushButton("Selecionar Pasta")
+        self.btn_select_folder.setFixedSize(160, 32)
         self.btn_process = QPushButton("Processar")
         self.btn_process.setFixedSize(160, 32)
+        self.btn_cancel = QPushButton("Cancelar")
+        self.btn_cancel.setFixedSize(160, 32)
+        self.btn_cancel.setEnabled(False)
         self.checkbox_equalize = QCheckBox("Equalizar 'Região'")
+        self.checkbox_summary = QCheckBox("Gerar resumo")
 
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.btn_select_file)
+        button_layout.addWidget(self.btn_select_folder)
         button_layout.addWidget(self.btn_process)
+        button_layout.addWidget(self.btn_cancel)
         button_layout.setSpacing(10)
 
         grid.addWidget(self.label_file, 0, 0)
         grid.addWidget(self.text_file, 0, 1)
         grid.addLayout(button_layout, 0, 2)
-        grid.addWidget(self.checkbox_equalize, 0, 3, Qt.AlignmentFlag.AlignLeft)
+        check_layout = QHBoxLayout()
+        check_layout.addWidget(self.checkbox_equalize)
+        check_layout.addWidget(self.checkbox_summary)
+        check_layout.setSpacing(10)
+        grid.addLayout(check_layout, 0, 3, Qt.AlignmentFlag.AlignLeft)
+
+        self.label_workers = QLabel("Processos paralelos:")
+        self.combo_workers = QComboBox()
+        self.combo_workers.addItems([str(n) for n in range(1, (os.cpu_count() or 1) + 1)])
+        self.combo_workers.setFixedWidth(80)
+
+        self.checkbox_columnar = QCheckBox("Conversão colunar (NumPy)")
+        self.checkbox_cache = QCheckBox("Reaproveitar abas inalteradas (cache)")
+        self.checkbox_combine = QCheckBox("Saída combinada (modo pasta)")
+
+        self.label_output_format = QLabel("Formato de saída:")
+        self.combo_output_format = QComboBox()
+        self.combo_output_format.addItems(list(SAIDAS))
+        self.combo_output_format.setFixedWidth(100)
+
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(self.label_workers)
+        options_layout.addWidget(self.combo_workers)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.checkbox_columnar)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.checkbox_cache)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.checkbox_combine)
+        options_layout.addSpacing(15)
+        options_layout.addWidget(self.label_output_format)
+        options_layout.addWidget(self.combo_output_format)
+        options_layout.addStretch()
+        grid.addLayout(options_layout, 1, 0, 1, 4)
+
+        self.label_memory = QLabel("Memória para ordenação:")
+        self.combo_memory = QComboBox()
+        self.combo_memory.addItems(["Sem limite", "256 MB", "512 MB", "1024 MB", "2048 MB"])
+        self.combo_memory.setFixedWidth(120)
+        self.checkbox_sqlite = QCheckBox("Excedente em SQLite")
+        self.checkbox_dedup = QCheckBox("Remover chamadas duplicadas")
+        self.checkbox_dedup_persist = QCheckBox("Lembrar chamadas de execuções anteriores")
+        self.checkbox_dedup_persist.setToolTip(
+            "Remove também as chamadas já gravadas a partir de outras planilhas (índice salvo na pasta). "
+            "Processar de novo a mesma planilha não remove as chamadas dela mesma"
+        )
+        self.checkbox_store = QCheckBox("Gravar na base de consultas")
+        self.checkbox_checkpoint = QCheckBox("Checkpoint (retomar se interrompido)")
+        self.btn_select_tariff = QPushButton("Tabela de Tarifas")
+        self.btn_select_tariff.setFixedSize(160, 32)
+        self.label_tariff = QLabel("Sem recálculo de tarifas")
+        self._tariff_path = None
+
+        memory_layout = QHBoxLayout()
+        memory_layout.addWidget(self.label_memory)
+        memory_layout.addWidget(self.combo_memory)
+        memory_layout.addSpacing(15)
+        memory_layout.addWidget(self.checkbox_sqlite)
+        memory_layout.addSpacing(15)
+        memory_layout.addWidget(self.checkbox_dedup)
+        memory_layout.addWidget(self.checkbox_dedup_persist)
+        memory_layout.addSpacing(15)
+        memory_layout.addWidget(self.checkbox_store)
+        memory_layout.addSpacing(15)
+        memory_layout.addWidget(self.checkbox_checkpoint)
+        memory_layout.addSpacing(15)
+        memory_layout.addWidget(self.btn_select_tariff)
+        memory_layout.addWidget(self.label_tariff)
+        memory_layout.addStretch()
+        grid.addLayout(memory_layout, 2, 0, 1, 4)
 
         self.btn_select_file.clicked.connect(self._emit_select_file)
+        self.btn_select_folder.clicked.connect(self._emit_select_folder)
+        self.btn_select_tariff.clicked.connect(self._select_tariff)
         self.btn_process.clicked.connect(self._emit_process_file)
+        self.btn_cancel.clicked.connect(self._emit_cancel)
 
         self.layout().addLayout(grid)
 
@@ -72,7 +155,17 @@ class PainelProcessamentoAgitel(QWidget):
         self.progress_bar.setValue(0)
         self.layout().addWidget(self.progress_bar)
 
+        self.label_metrics = QLabel("")
+        self.layout().addWidget(self.label_metrics)
+
     def _create_results_area(self):
+        # Progresso por arquivo no modo pasta
+        self.list_files = QListWidget()
+        self.list_files.setMaximumHeight(120)
+        self.list_files.setVisible(False)
+        self.layout().addWidget(self.list_files)
+        self._file_items = {}
+
         self.text_results = QTextEdit()
         self.text_results.setReadOnly(True)
         self.text_results.setPlaceholderText("Resultados do processamento...")
@@ -84,17 +177,37 @@ class PainelProcessamentoAgitel(QWidget):
             'label': estilo_label_dark() if is_dark_mode else estilo_label_light(),
             'line': campo_qline_dark() if is_dark_mode else campo_qline_light(),
             'check': estilo_check_box_dark() if is_dark_mode else estilo_check_box_light(),
+            'combo': estilo_combo_box_dark() if is_dark_mode else estilo_combo_box_light(),
             'log': estilo_log_dark() if is_dark_mode else estilo_log_light(),
             'progress': estilo_progress_bar_dark() if is_dark_mode else estilo_progress_bar_light()
         }
 
         self.label_file.setStyleSheet(styles['label'])
+        self.label_workers.setStyleSheet(styles['label'])
+        self.combo_workers.setStyleSheet(styles['combo'])
+        self.label_output_format.setStyleSheet(styles['label'])
+        self.combo_output_format.setStyleSheet(styles['combo'])
         self.text_file.setStyleSheet(styles['line'])
         self.checkbox_equalize.setStyleSheet(styles['check'])
+        self.checkbox_summary.setStyleSheet(styles['check'])
+        self.checkbox_columnar.setStyleSheet(styles['check'])
+        self.checkbox_cache.setStyleSheet(styles['check'])
+        self.checkbox_combine.setStyleSheet(styles['check'])
+        self.label_memory.setStyleSheet(styles['label'])
+        self.combo_memory.setStyleSheet(styles['combo'])
+        self.checkbox_sqlite.setStyleSheet(styles['check'])
+        self.checkbox_dedup.setStyleSheet(styles['check'])
+        self.checkbox_dedup_persist.setStyleSheet(styles['check'])
+        self.checkbox_store.setStyleSheet(styles['check'])
+        self.checkbox_checkpoint.setStyleSheet(styles['check'])
+        self.label_tariff.setStyleSheet(styles['label'])
         self.text_results.setStyleSheet(styles['log'])
+        self.list_files.setStyleSheet(styles['log'].replace("QTextEdit", "QListWidget"))
         self.progress_bar.setStyleSheet(styles['progress'])
+        self.label_metrics.setStyleSheet(styles['label'])
 
-        for btn in [self.btn_select_file, self.btn_process]:
+        for btn in [self.btn_select_file, self.btn_select_folder, self.btn_process, self.btn_cancel,
+                    self.btn_select_tariff]:
             estilo_hover(btn, is_dark_mode)
 
     def _connect_signals(self):
@@ -111,8 +224,42 @@ class PainelProcessamentoAgitel(QWidget):
         if file_path:
             self.text_file.setText(file_path)
             settings.setValue("last_open_dir", os.path.dirname(file_path))
+            self._reset_file_list()
             self.append_log(f"📂 Arquivo selecionado: {os.path.basename(file_path)}")
 
+    def _emit_select_folder(self):
+        settings = QSettings("LivreEscolha", "LE_Helper")
+        folder = QFileDialog.getExistingDirectory(self, "Selecionar Pasta", settings.value("last_open_dir", ""))
+        if folder:
+            self.text_file.setText(folder)
+            settings.setValue("last_open_dir", folder)
+            self._reset_file_list()
+            self.append_log(f"📁 Pasta selecionada: {os.path.basename(folder)} (todas as planilhas serão processadas)")
+
+    def _emit_cancel(self):
+        self.btn_cancel.setEnabled(False)
+        self.append_log("🛑 Cancelando... (as abas já concluídas ficam no checkpoint, se ativado)")
+        self.processCancelled.emit()
+
+    def _select_tariff(self):
+        """Escolhe a tabela de tarifas; cancelar a seleção desliga o recálculo."""
+        settings = QSettings("LivreEscolha", "LE_Helper")
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Selecionar Tabela de Tarifas", settings.value("last_open_dir", ""),
+            "Tabelas (*.xlsx *.csv)"
+        )
+        self._tariff_path = path or None
+        if path:
+            self.label_tariff.setText(f"Tarifas: {os.path.basename(path)}")
+            self.append_log(f"💲 Tabela de tarifas: {os.path.basename(path)} (valores serão conferidos)")
+        else:
+            self.label_tariff.setText("Sem recálculo de tarifas")
+
+    def _reset_file_list(self):
+        self.list_files.clear()
+        self._file_items = {}
+        self.list_files.setVisible(False)
+
     def _emit_process_file(self):
         if not self.text_file.text():
             self.append_log("⚠️ Selecione um arquivo antes de processar!")
@@ -126,9 +273,34 @@ class PainelProcessamentoAgitel(QWidget):
         if value == 100:
             self.append_log("✅ Processamento concluído, salvando arquivo!")
 
+    @pyqtSlot(dict)
+    def update_metrics(self, metrics):
+        def milhar(valor):
+            return f"{int(valor):,}".replace(",", ".")
+
+        megabytes = f"{metrics['bytes'] / 1_048_576:.1f}".replace(".", ",")
+        text = (
+            f"{milhar(metrics['linhas'])} de {milhar(metrics['total_linhas'])} linhas · "
+            f"{milhar(metrics['linhas_por_segundo'])} linhas/s · {megabytes} MB lidos"
+        )
+        if metrics['eta'] is not None and metrics['linhas'] < metrics['total_linhas']:
+            restante = int(metrics['eta'])
+            text += f" · restam ~{restante // 3600:02d}:{restante // 60 % 60:02d}:{restante % 60:02d}"
+        self.label_metrics.setText(text)
+
+    @pyqtSlot(str, int)
+    def update_file_progress(self, name, value):
+        item = self._file_items.get(name)
+        if item is None:
+            self.list_files.addItem(name)
+            item = self._file_items[name] = self.list_files.item(self.list_files.count() - 1)
+            self.list_files.setVisible(True)
+        item.setText(f"{'✅' if value >= 100 else '⏳'} {name} — {value}%")
+
     @pyqtSlot(str)
     def on_process_finished(self, message):
         self.btn_process.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
         self.append_log("──────────────────────────────────────────────────")
         self.append_log(f"🎉 {message}")
 
@@ -141,6 +313,7 @@ class PainelProcessamentoAgitel(QWidget):
     @pyqtSlot(str)
     def show_error(self, message):
         self.append_log(f"⛔ ERRO: {message}")
+        self.btn_cancel.setEnabled(False)
         self.append_log("🛑 Processamento interrompido!")
         self.scroll_to_bottom()
 
@@ -152,11 +325,81 @@ class PainelProcessamentoAgitel(QWidget):
     def get_file_path(self):
         return self.text_file.text()
 
+    def is_folder_mode(self):
+        return os.path.isdir(self.text_file.text())
+
+    def get_combine_option(self):
+        return self.checkbox_combine.isChecked()
+
     def get_equalize_option(self):
         return self.checkbox_equalize.isChecked()
 
+    def get_summary_option(self):
+        return self.checkbox_summary.isChecked()
+
+    def get_workers_option(self):
+        return int(self.combo_workers.currentText())
+
+    def get_conversion_mode(self):
+        return "colunar" if self.checkbox_columnar.isChecked() else "linha"
+
+    def get_cache_option(self):
+        return self.checkbox_cache.isChecked()
+
+    def get_memory_budget(self):
+        text = self.combo_memory.currentText()
+        return int(text.split()[0]) if text[0].isdigit() else None
+
+    def get_spill_backend(self):
+        return "sqlite" if self.checkbox_sqlite.isChecked() else "arquivos"
+
+    def get_dedup_option(self):
+        return self.checkbox_dedup.isChecked()
+
+    def get_dedup_path(self):
+        """Índice persistente de chamadas, guardado na pasta das planilhas."""
+        if not (self.checkbox_dedup.isChecked() and self.checkbox_dedup_persist.isChecked()):
+            return None
+        path = self.text_file.text()
+        folder = path if os.path.isdir(path) else os.path.dirname(path)
+        return os.path.join(folder, "agitel_duplicatas.idx")
+
+    def get_checkpoint_option(self):
+        return self.checkbox_checkpoint.isChecked()
+
+    def get_tariff_path(self):
+        return self._tariff_path
+
+    def get_store_path(self):
+        """Base de consultas (SQLite), guardada na pasta das planilhas."""
+        if not self.checkbox_store.isChecked():
+            return None
+        path = self.text_file.text()
+        folder = path if os.path.isdir(path) else os.path.dirname(path)
+        return os.path.join(folder, "agitel_consultas.db")
+
+    def get_output_format(self):
+        return self.combo_output_format.currentText()
+
     def set_processing_state(self, processing):
         self.btn_process.setEnabled(not processing)
+        self.btn_cancel.setEnabled(processing)
         self.btn_select_file.setEnabled(not processing)
+        self.btn_select_folder.setEnabled(not processing)
+        self.checkbox_combine.setEnabled(not processing)
+        self.combo_memory.setEnabled(not processing)
+        self.checkbox_sqlite.setEnabled(not processing)
+        self.checkbox_dedup.setEnabled(not processing)
+        self.checkbox_dedup_persist.setEnabled(not processing)
+        self.checkbox_store.setEnabled(not processing)
+        self.checkbox_checkpoint.setEnabled(not processing)
+        self.btn_select_tariff.setEnabled(not processing)
+        self.combo_workers.setEnabled(not processing)
+        self.checkbox_columnar.setEnabled(not processing)
+        self.checkbox_cache.setEnabled(not processing)
+        self.checkbox_summary.setEnabled(not processing)
+        self.combo_output_format.setEnabled(not processing)
+        if processing:
+            self.label_metrics.clear()
         status = "Processando..." if processing else "Pronto"
         self.append_log(f"📢 Status: {status}")
\ No newline at end of file
@@ -0,0 +1,30 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils.callStore import BaseChamadas, COLUNAS, TIPOS, FORMATOS
+from utils.outputSinks import SAIDAS
+
+
+class ExportacaoConsultaWorker(QObject):
+    """
+    Exporta as chamadas filtradas da base de consultas fora da thread da
+    interface. A conexão SQLite é aberta dentro de executar(), na thread
+    do worker, como o sqlite3 exige.
+    """
+    concluido = pyqtSignal(int)
+    erro = pyqtSignal(str)
+
+    def __init__(self, caminho_base, caminho_saida, formato, filtros):
+        super().__init__()
+        self.caminho_base = caminho_base
+        self.caminho_saida = caminho_saida
+        self.formato = formato
+        self.filtros = filtros
+
+    def executar(self):
+        try:
+            with BaseChamadas(self.caminho_base) as base:
+                with SAIDAS[self.formato](self.caminho_saida, COLUNAS, TIPOS, FORMATOS) as saida:
+                    total = base.exportar(saida, **self.filtros)
+        except Exception as e:
+            self.erro.emit(str(e))
+            return
+        self.concluido.emit(total)
@@ -0,0 +1,525 @@
+import re
+import os
+import logging
+import tempfile
+import unicodedata
+from contextlib import closing
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter, attrgetter
+from datetime import time as dt_time, datetime as dt_datetime, timedelta
+from openpyxl import load_workbook
+from openpyxl.utils import datetime as xl_datetime
+from openpyxl.utils.datetime import WINDOWS_EPOCH
+from utils.externalSort import gravar_linhas
+from utils.xlsxReader import PlanilhaXlsx, AbaXlsx
+from utils.currencyParser import ConversorMoeda
+from utils.progressMetrics import TemposEtapas
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Incrementar sempre que a conversão das linhas mudar, para invalidar o cache de abas
+VERSAO_CONVERSAO = 1
+
+# Ordinal da base dos seriais de data do Excel (1900), para a conversão em lote de datas
+EPOCH_ORDINAL = WINDOWS_EPOCH.toordinal()
+
+MAPEAMENTO_COLUNAS = {
+    'data': ['data', 'datachamada', 'datahora', 'datahorario'],
+    'origem': ['origem', 'ramalorigem', 'setor', 'operador'],
+    'servico': ['servico', 'tiposervico', 'serviço', 'tipochamada'],
+    'regiao': ['regiao', 'região', 'localchamada', 'ddd'],
+    'destino': ['destino', 'numerodestino', 'telefone', 'ramaldestino'],
+    'duracao': ['duracao', 'tempochamada', 'tempogasto', 'duraçao'],
+    'preco': ['preco', 'custochamada', 'valor', 'tarifa']
+}
+
+# Equalização da coluna Região: (expressão regular, região canônica). As
+# regras são avaliadas em ordem, sem diferenciar maiúsculas, e a primeira que
+# encontrar a expressão em qualquer ponto do texto define a região
+REGRAS_REGIAO = [
+    (r"fixo", "Fixo"),
+    (r"m[oó]vel", "Móvel"),
+    (r"^\s+$", "Intragrupo"),
+]
+
+# Ordem dos campos lidos de cada linha, na mesma ordem de COLUNAS_SAIDA
+COLUNAS_ENTRADA = ('data', 'origem', 'servico', 'regiao', 'destino', 'duracao', 'preco')
+
+
+@lru_cache(maxsize=4096)
+def _normalizar(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', texto.lower())
+                   if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=1)
+def _aliases_normalizados():
+    return {
+        key: [_normalizar(alias) for alias in aliases]
+        for key, aliases in MAPEAMENTO_COLUNAS.items()
+    }
+
+
+def compilar_regras_regiao(regras):
+    """
+    Compila as regras numa única expressão (uma alternativa com lookahead por
+    regra, na ordem da tabela) e retorna a função que equaliza um valor.
+    Valores vazios e sem regra correspondente são mantidos.
+    """
+    alternativas = "|".join(f"(?P<r{indice}>(?=.*?(?:{expressao})))" for indice, (expressao, _) in enumerate(regras))
+    padrao = re.compile(f"^(?:{alternativas})", re.IGNORECASE | re.DOTALL)
+    regioes = [regiao for _, regiao in regras]
+
+    @lru_cache(maxsize=1024)
+    def equalizar(valor):
+        if not valor:
+            return valor
+        match = padrao.match(valor)
+        return regioes[int(match.lastgroup[1:])] if match else valor
+
+    return equalizar
+
+
+@dataclass
+class PlanoAba:
+    """Resultado da detecção de cabeçalho de uma aba, calculado uma única vez."""
+    title: str
+    header_row: int
+    indices: dict
+
+
+class LeitorAgitel:
+    """
+    Leitura e conversão das abas de uma planilha Agitel, sem dependência de Qt.
+
+    Serve de base para o ProcessadorAgitel (QThread) e é instanciada
+    diretamente nos processos do modo paralelo.
+
+    reader_backend escolhe o motor de leitura: "xml" lê o XML das abas
+    direto do zip (utils.xlsxReader) e decodifica só as colunas usadas;
+    "openpyxl" usa o modo read_only do openpyxl, que também é o fallback
+    quando o arquivo não pode ser aberto pelo leitor XML.
+
+    conversion_mode escolhe como cada chunk é convertido: "linha" usa o
+    conversor compilado linha a linha; "colunar" separa o chunk em colunas
+    e converte datas, durações e valores em lote com NumPy (se o NumPy não
+    estiver instalado, volta para o modo "linha").
+    """
+
+    def __init__(self, chunk_size=5000, reader_backend="xml", conversion_mode="linha",
+                 currency_cache_size=4096, region_rules=None, **kwargs):
+        super().__init__(**kwargs)
+        self.chunk_size = chunk_size
+        self.reader_backend = reader_backend
+        self.conversion_mode = conversion_mode
+        self.currency_cache_size = currency_cache_size
+        self.conversor_moeda = ConversorMoeda(currency_cache_size)
+        self.region_rules = region_rules
+        self._equalize_region = compilar_regras_regiao(region_rules) if region_rules else None
+        self.rows_read = 0
+        self.bytes_read = 0
+        self.stage_times = TemposEtapas()
+        self.log_messages = []
+        self._interrupted = False
+        self._sheet_plans = {}
+
+    def _log(self, message):
+        self.log_messages.append(message)
+
+    def _reader_options(self):
+        """Opções para recriar este leitor em outro processo."""
+        return {
+            'chunk_size': self.chunk_size,
+            'reader_backend': self.reader_backend,
+            'conversion_mode': self.conversion_mode,
+            'currency_cache_size': self.currency_cache_size,
+            'region_rules': self.region_rules,
+        }
+
+    def _emit_sheet_progress(self, rows_read, total_rows):
+        pass
+
+    def _open_workbook(self, file_path):
+        if self.reader_backend == "xml":
+            try:
+                return PlanilhaXlsx(file_path)
+            except Exception as e:
+                self._log(f"Leitor XML indisponível ({str(e)[:50]}), usando openpyxl")
+        return load_workbook(file_path, read_only=True)
+
+    def _plan_sheet(self, sheet):
+        """
+        Detecta o cabeçalho e os índices das colunas de uma aba e guarda o
+        plano, para que validação e processamento não releiam a aba.
+        Retorna None quando a aba não tem cabeçalho reconhecível.
+        """
+        if sheet.title not in self._sheet_plans:
+            plan = None
+            header = self._find_header_row(sheet)
+            if header:
+                row_number, header_row = header
+                plan = PlanoAba(sheet.title, row_number, self._get_column_indices(header_row))
+            self._sheet_plans[sheet.title] = plan
+        return self._sheet_plans[sheet.title]
+
+    def _process_sheet(self, sheet, plan=None):
+        plan = plan or self._plan_sheet(sheet)
+        if not plan:
+            return
+
+        indices = plan.indices
+        convert_chunk = self._build_chunk_converter(indices)
+        start_row = plan.header_row + 1
+        total_rows = max((sheet.max_row or 0) - start_row + 1, 0)
+        if isinstance(sheet, AbaXlsx):
+            # No modo colunar as datas e durações chegam como seriais do Excel,
+            # que são convertidos em lote sem passar por datetime/time. Planilhas
+            # com datas de 1904 têm outra base de seriais e seguem pela conversão normal
+            raw_dates = self.conversion_mode == "colunar" and sheet.parent.epoch == WINDOWS_EPOCH
+            rows = sheet.iter_rows(min_row=start_row, values_only=True, columns=set(indices.values()),
+                                   raw_dates=raw_dates)
+        else:
+            rows = sheet.iter_rows(min_row=start_row, values_only=True)
+        rows_read = 0
+        bytes_before = self.bytes_read
+
+        # Interrompido, o gerador é abandonado: closing fecha já o XML da aba
+        with closing(rows):
+            while not self._interrupted:
+                with self.stage_times.medir("leitura"):
+                    raw_chunk = list(islice(rows, self.chunk_size))
+                if not raw_chunk:
+                    return
+                rows_read += len(raw_chunk)
+                self.rows_read += len(raw_chunk)
+                if isinstance(sheet, AbaXlsx):
+                    self.bytes_read = bytes_before + sheet.bytes_lidos
+
+                with self.stage_times.medir("conversão"):
+                    chunk = convert_chunk(raw_chunk)
+
+                self._emit_sheet_progress(rows_read, total_rows)
+                if chunk:
+                    yield chunk
+
+    def _build_chunk_converter(self, indices):
+        convert_row = self._build_row_converter(indices)
+        if self.conversion_mode != "colunar":
+            return lambda raw_chunk: self._convert_rows(convert_row, raw_chunk)
+        if np is None:
+            self._log("NumPy não instalado, usando conversão linha a linha")
+            self.conversion_mode = "linha"
+            return lambda raw_chunk: self._convert_rows(convert_row, raw_chunk)
+
+        get_fields = itemgetter(*(indices[key] for key in COLUNAS_ENTRADA))
+
+        def convert(raw_chunk):
+            try:
+                data, origem, servico, regiao, destino, duracao, preco = zip(*map(get_fields, raw_chunk))
+            except Exception:
+                # Alguma linha incompleta: o modo linha a linha registra e ignora só ela
+                return self._convert_rows(convert_row, raw_chunk)
+
+            duracoes, minutos = self._columnar_durations(duracao)
+            regioes = [r if r.__class__ is str else str(r or "") for r in regiao]
+            if self._equalize_region:
+                regioes = list(map(self._equalize_region, regioes))
+            return list(map(list, zip(
+                self._columnar_dates(data),
+                [o.strip() if o.__class__ is str else str(o or "").strip() for o in origem],
+                [s if s.__class__ is str else str(s or "") for s in servico],
+                regioes,
+                [d.strip() if d.__class__ is str else str(d or "").strip() for d in destino],
+                duracoes,
+                minutos,
+                self._columnar_currency(preco)
+            )))
+
+        return convert
+
+    def _convert_rows(self, convert_row, raw_chunk):
+        chunk = []
+        for row in raw_chunk:
+            try:
+                chunk.append(convert_row(row))
+            except Exception as e:
+                self._log(f"Linha ignorada: {str(e)[:50]}")
+        return chunk
+
+    def _columnar_dates(self, column):
+        kinds = set(map(type, column))
+        if kinds <= {int, float}:
+            return list(column)
+
+        if kinds == {dt_datetime}:
+            size = len(column)
+            days = np.fromiter(map(dt_datetime.toordinal, column), np.int64, size) - EPOCH_ORDINAL
+            days -= (days > 0) & (days <= 60)
+            seconds = self._time_fields_to_seconds(column)
+            micro = np.fromiter(map(attrgetter('microsecond'), column), np.int64, size)
+            # Mesma sequência de operações do modo linha, para valores idênticos
+            return (days + (seconds + micro / 10**6) / 86400).tolist()
+
+        convert_date = self._convert_date
+        return [convert_date(value) or "" for value in column]
+
+    def _columnar_durations(self, column):
+        """Versão em lote de _parse_duration: retorna (frações do dia, minutos)."""
+        groups = {}
+        for index, value in enumerate(column):
+            groups.setdefault(value.__class__, []).append(index)
+
+        seconds = np.zeros(len(column))
+        others = {}
+        for kind, positions in groups.items():
+            if kind is dt_time:
+                seconds[positions] = self._time_fields_to_seconds([column[i] for i in positions])
+            elif kind is float or kind is int:
+                seconds[positions] = np.rint(np.array([column[i] for i in positions], dtype=float) * 86400)
+            elif kind is str:
+                parsed, ok = self._hms_to_seconds([column[i] for i in positions])
+                positions = np.asarray(positions)
+                seconds[positions[ok]] = parsed[ok]
+                for index in positions[~ok].tolist():
+                    others[index] = self._parse_duration(column[index])
+            else:
+                for index in positions:
+                    others[index] = self._parse_duration(column[index])
+
+        duracoes = (seconds / 86400).tolist()
+        minutos = (np.floor_divide(seconds + 3, 6) / 10).tolist()
+        for index, (duracao, minuto) in others.items():
+            duracoes[index] = duracao
+            minutos[index] = minuto
+        return duracoes, minutos
+
+    @staticmethod
+    def _time_fields_to_seconds(values):
+        size = len(values)
+        hours = np.fromiter(map(attrgetter('hour'), values), np.int64, size)
+        minutes = np.fromiter(map(attrgetter('minute'), values), np.int64, size)
+        seconds = np.fromiter(map(attrgetter('second'), values), np.int64, size)
+        return hours * 3600 + minutes * 60 + seconds
+
+    def _hms_to_seconds(self, strings):
+        """
+        Converte strings "hh:mm:ss" em segundos lendo os códigos dos
+        caracteres como um array. Retorna (segundos, máscara de válidos);
+        formatos diferentes ficam fora da máscara.
+        """
+        array = np.array(strings)
+        if array.dtype != np.dtype('<U8'):
+            return np.zeros(len(strings)), np.zeros(len(strings), dtype=bool)
+
+        codes = array.view(np.uint32).reshape(len(strings), 8).astype(np.int64)
+        digits = codes[:, [0, 1, 3, 4, 6, 7]] - 48
+        ok = ((digits >= 0) & (digits <= 9)).all(axis=1) & (codes[:, 2] == 58) & (codes[:, 5] == 58)
+        parsed = ((digits[:, 0] * 10 + digits[:, 1]) * 3600
+                  + (digits[:, 2] * 10 + digits[:, 3]) * 60
+                  + digits[:, 4] * 10 + digits[:, 5])
+        return parsed.astype(float), ok
+
+    def _columnar_currency(self, column):
+        # Poucos valores distintos se repetem muito: converte cada um uma vez
+        codes = {}
+        positions = [codes.setdefault(value, len(codes)) for value in column]
+        parse_currency = self.conversor_moeda.converter
+        values = np.array([parse_currency(value) for value in codes], dtype=float)
+        return values[positions].tolist()
+
+    def _build_row_converter(self, indices):
+        """
+        Monta, uma vez por aba, a função que converte uma linha bruta na linha
+        de saída: os índices ficam fixos no itemgetter, os tipos mais comuns
+        (datetime, time e string "hh:mm:ss") são tratados inline e a duração é
+        interpretada uma única vez para as duas colunas de saída. A região já
+        sai equalizada quando há regras configuradas.
+        """
+        get_fields = itemgetter(*(indices[key] for key in COLUNAS_ENTRADA))
+        equalize_region = self._equalize_region
+        convert_date = self._convert_date
+        parse_duration = self._parse_duration
+        parse_currency = self.conversor_moeda.converter
+
+        def convert(row):
+            data, origem, servico, regiao, destino, duracao, preco = get_fields(row)
+
+            if data.__class__ is dt_datetime:
+                days = (data - WINDOWS_EPOCH).days
+                if 0 < days <= 60:
+                    days -= 1
+                data = days + (data.hour * 3600 + data.minute * 60 + data.second
+                               + data.microsecond / 10**6) / 86400
+            else:
+                data = convert_date(data) or ""
+
+            if duracao.__class__ is dt_time:
+                seconds = duracao.hour * 3600 + duracao.minute * 60 + duracao.second
+                duracao, minutos = seconds / 86400, (seconds + 3) // 6 / 10
+            else:
+                duracao, minutos = parse_duration(duracao)
+
+            if regiao.__class__ is not str:
+                regiao = str(regiao or "")
+            if equalize_region:
+                regiao = equalize_region(regiao)
+
+            return [
+                data,
+                origem.strip() if origem.__class__ is str else str(origem or "").strip(),
+                servico if servico.__class__ is str else str(servico or ""),
+                regiao,
+                destino.strip() if destino.__class__ is str else str(destino or "").strip(),
+                duracao,
+                minutos,
+                parse_currency(preco)
+            ]
+
+        return convert
+
+    def _convert_date(self, value):
+        if isinstance(value, dt_datetime):
+            return xl_datetime.to_excel(value)
+        return value
+
+    def _parse_duration(self, value):
+        """Retorna (duração como fração do dia, duração em minutos)."""
+        if isinstance(value, dt_time):
+            seconds = value.hour * 3600 + value.minute * 60 + value.second
+        elif isinstance(value, str):
+            try:
+                h, m, s = map(int, value.split(':'))
+            except ValueError:
+                return 0.0, 0.0
+            seconds = h * 3600 + m * 60 + s
+        elif isinstance(value, timedelta):
+            seconds = value.total_seconds()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            seconds = round(value * 86400)
+        else:
+            return value, 0.0
+        return seconds / 86400, (seconds + 3) // 6 / 10
+
+    def _parse_currency(self, value):
+        return self.conversor_moeda.converter(value)
+
+    def _find_header_row(self, sheet):
+        """
+        (número da linha, células) do cabeçalho nas 20 primeiras linhas; None se
+        não houver. O número vem da posição: células vazias do openpyxl não têm .row.
+        """
+        essential_columns = {'data', 'origem', 'destino', 'duracao', 'preco'}
+
+        with closing(sheet.iter_rows(max_row=20)) as rows:
+            for row_number, row in enumerate(rows, start=1):
+                if self._is_data_row(row):
+                    continue
+
+                found = set()
+                for cell in row:
+                    if cell.value:
+                        normalized = self._normalize(str(cell.value))
+                        if normalized in essential_columns:
+                            found.add(normalized)
+
+                if found >= essential_columns:
+                    return row_number, row
+        return None
+
+    def _is_data_row(self, row):
+        data_patterns = 0
+        for cell in row:
+            if isinstance(cell.value, (dt_datetime, int, float)):
+                data_patterns += 1
+            elif isinstance(cell.value, str):
+                if re.match(r"\d{2}/\d{2}/\d{4}", cell.value):
+                    data_patterns += 1
+                elif re.match(r"\d{2}:\d{2}:\d{2}", cell.value):
+                    data_patterns += 1
+                elif "R$" in cell.value:
+                    data_patterns += 1
+
+        return data_patterns >= 3
+
+    def _get_column_indices(self, header_row):
+        positions = {}
+        for index, cell in enumerate(header_row):
+            positions.setdefault(self._normalize(str(cell.value)), index)
+
+        indices = {}
+        for key, aliases in _aliases_normalizados().items():
+            for alias in aliases:
+                if alias in positions:
+                    indices[key] = positions[alias]
+                    break
+            else:
+                raise ValueError(f"Coluna '{key}' não encontrada")
+        return indices
+
+    def _normalize(self, text):
+        return _normalizar(str(text))
+
+
+# Estado de cada processo do pool: a planilha é aberta uma única vez por processo
+# no initializer e reaproveitada por todas as abas que ele receber.
+_worker_estado = {}
+
+
+def _inicializar_worker(file_path, opcoes):
+    leitor = LeitorAgitel(**opcoes)
+    _worker_estado['wb'] = leitor._open_workbook(file_path)
+    _worker_estado['leitor'] = leitor
+
+
+def _processar_aba_worker(sheet_title, plan, pasta_temp=None, parar=None):
+    """
+    Converte uma aba dentro de um processo do pool.
+
+    As linhas convertidas são gravadas em blocos num arquivo temporário, para
+    que o processo principal as consuma em ordem sem recebê-las de uma vez.
+    Retorna (caminho, total de linhas convertidas, mensagens de log,
+    estatísticas da aba: acertos/falhas do cache de valores, linhas lidas da
+    planilha, bytes lidos e tempos por etapa), ou None se o evento `parar`
+    (conferido a cada bloco) interromper a aba. As linhas lidas são as
+    contadas no modo serial, para as métricas serem as mesmas nos dois modos.
+    """
+    if parar is not None and parar.is_set():
+        return None
+    leitor = _worker_estado['leitor']
+    leitor._interrupted = False
+    leitor.log_messages = []
+    leitor.rows_read = 0
+    leitor.bytes_read = 0
+    leitor.stage_times = TemposEtapas()
+    acertos_antes, falhas_antes = leitor.conversor_moeda.estatisticas()
+    sheet = _worker_estado['wb'][sheet_title]
+
+    fd, caminho = tempfile.mkstemp(prefix="aba_", suffix=".tmp", dir=pasta_temp)
+    total = 0
+    try:
+        with os.fdopen(fd, "wb") as arquivo:
+            for chunk in leitor._process_sheet(sheet, plan):
+                gravar_linhas(arquivo, chunk)
+                total += len(chunk)
+                if parar is not None and parar.is_set():
+                    leitor._interrupted = True
+    except Exception:
+        logging.exception(f"Erro ao processar a aba {sheet_title}")
+        os.remove(caminho)
+        raise
+    if leitor._interrupted:
+        os.remove(caminho)
+        return None
+    acertos, falhas = leitor.conversor_moeda.estatisticas()
+    estatisticas = {
+        'cache_moeda': (acertos - acertos_antes, falhas - falhas_antes),
+        'linhas_lidas': leitor.rows_read,
+        'bytes': leitor.bytes_read,
+        'tempos': leitor.stage_times.tempos,
+    }
+    return caminho, total, leitor.log_messages, estatisticas
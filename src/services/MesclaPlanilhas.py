@@ -1,24 +1,196 @@
 import os
 import logging
 import time
+import shutil
+import tempfile
+import unicodedata
+from contextlib import closing
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from openpyxl import load_workbook, Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 from PyQt6.QtCore import QObject, pyqtSignal
+from utils.externalSort import gravar_linhas, ler_linhas
+from utils.mergeManifest import ManifestoMesclagem
+from utils.xlsxReader import PlanilhaXlsx, AbaXlsx
+
+
+def _abrir_entrada(arquivo, reader_backend):
+    if reader_backend == "xml":
+        try:
+            return PlanilhaXlsx(arquivo)
+        except Exception as e:
+            logging.info(f"Leitor XML indisponível para {arquivo} ({str(e)[:50]}), usando openpyxl")
+    return load_workbook(arquivo, read_only=True, data_only=True)
+
+
+def _normalizar_nome(valor):
+    texto = unicodedata.normalize('NFD', " ".join(str(valor).split()).lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _titulo_coluna(valor):
+    """Título do cabeçalho; None para células vazias, em branco ou com o texto "None" (saem vazias na saída)"""
+    if valor is None or str(valor).strip() in ("", "None"):
+        return None
+    return valor
+
+
+def _ler_cabecalho(ws):
+    """Títulos da primeira linha da aba (só ela é lida)"""
+    with closing(ws.iter_rows(min_row=1, max_row=1, values_only=True)) as linhas:
+        return tuple(_titulo_coluna(valor) for valor in next(linhas, ()))
+
+
+def _cabecalho_gravavel(cabecalho):
+    """Títulos como tipos do JSON do manifesto (os demais viram texto), iguais lidos do arquivo ou do manifesto"""
+    return [
+        valor if valor is None or isinstance(valor, (str, int, float, bool)) else str(valor)
+        for valor in cabecalho
+    ]
+
+
+def _mapear_colunas(cabecalho, nomes, colunas=()):
+    """
+    Índice de cada nome no cabeçalho, sem diferenciar caixa e acentos (None se
+    a coluna não existe). Nomes None (colunas sem título no base) ficam na
+    posição de `colunas`, como na mesclagem posicional.
+    """
+    posicoes = {}
+    for indice, valor in enumerate(cabecalho):
+        if valor is not None:
+            posicoes.setdefault(_normalizar_nome(valor), indice)
+    return [
+        posicoes.get(_normalizar_nome(nome)) if nome is not None
+        else colunas[indice] if indice < len(colunas) else None
+        for indice, nome in enumerate(nomes)
+    ]
+
+
+def _colunas_entrada(ws, colunas, nomes):
+    """Colunas a ler da aba: as posições de `colunas` ou, com `nomes`, as que o cabeçalho dela indica"""
+    return colunas if nomes is None else _mapear_colunas(_ler_cabecalho(ws), nomes, colunas)
+
+
+def _linhas_selecionadas(ws, colunas):
+    """Linhas de dados (sem o cabeçalho) reduzidas às colunas selecionadas; posições None saem vazias"""
+    if isinstance(ws, AbaXlsx):
+        # Projeção no leitor XML: as células das demais colunas nem são decodificadas
+        lidas = {col for col in colunas if col is not None}
+        linhas = ws.iter_rows(min_row=2, values_only=True, columns=lidas or {0})
+    else:
+        linhas = ws.iter_rows(min_row=2, values_only=True)
+    for row in linhas:
+        yield [None if col is None else row[col] if col < len(row) else "" for col in colunas]
+
+
+def _ler_arquivo_worker(arquivo, colunas, pasta_temp, reader_backend="xml", nomes=None):
+    """
+    Lê as colunas selecionadas de um arquivo dentro de um processo do pool,
+    gravando as linhas em blocos num temporário de pasta_temp. Com `nomes`,
+    as colunas são localizadas pelo cabeçalho do arquivo. Retorna o caminho
+    do temporário e as colunas lidas.
+    """
+    wb = _abrir_entrada(arquivo, reader_backend)
+    fd, caminho = tempfile.mkstemp(prefix="arquivo_", suffix=".tmp", dir=pasta_temp)
+    try:
+        colunas = _colunas_entrada(wb.active, colunas, nomes)
+        with os.fdopen(fd, "wb") as saida:
+            gravar_linhas(saida, _linhas_selecionadas(wb.active, colunas))
+    except Exception:
+        os.remove(caminho)
+        raise
+    finally:
+        wb.close()
+    return caminho, colunas
+
+
+class _SaidaAnterior:
+    """Lê intervalos de linhas da saída anterior, numa passada só quando eles vêm em ordem"""
+
+    def __init__(self, caminho):
+        self._planilha = PlanilhaXlsx(caminho)
+        self._linhas = None
+        self._proxima = None
+
+    def linhas(self, inicio, fim):
+        if self._linhas is None or self._proxima > inicio:
+            if self._linhas is not None:
+                self._linhas.close()
+            self._linhas = self._planilha.active.iter_rows(min_row=inicio, values_only=True)
+            self._proxima = inicio
+        while self._proxima < inicio:
+            next(self._linhas, None)
+            self._proxima += 1
+        while self._proxima <= fim:
+            # Linhas vazias no fim do intervalo podem nem estar no XML
+            linha = next(self._linhas, ())
+            self._proxima += 1
+            yield list(linha)
+
+    def fechar(self):
+        if self._linhas is not None:
+            self._linhas.close()
+        self._planilha.close()
 
 
 class PlanilhaMesclagemWorker(QObject):
+    """
+    Mescla a aba ativa de vários arquivos numa planilha só, com as colunas
+    selecionadas. Com `workers` > 1 os arquivos são lidos em paralelo num
+    pool de processos, e um único escritor anexa as linhas na ordem original.
+
+    reader_backend "xml" lê as entradas com utils.xlsxReader, decodificando
+    só as colunas selecionadas; "openpyxl" usa o modo read_only do openpyxl,
+    que também é o fallback quando o leitor XML não abre o arquivo.
+
+    Por padrão as colunas são posicionais: o índice escolhido no arquivo
+    base vale para todos. Com `alinhar_cabecalho`, cada arquivo tem as
+    colunas localizadas pelo nome no próprio cabeçalho (sem diferenciar
+    caixa e acentos), e as que faltarem saem vazias; colunas sem nome no
+    base ficam pela posição, como no modo posicional. Com `unir_colunas`,
+    as colunas que aparecem em algum arquivo e não estão no base são
+    acrescentadas ao fim, o que exige ler antes o cabeçalho de todos os
+    arquivos.
+
+    Com `incremental`, um manifesto ao lado da saída (utils.mergeManifest)
+    registra os arquivos mesclados e as linhas que cada um ocupa. Na
+    execução seguinte, as linhas dos arquivos inalterados são copiadas da
+    saída anterior, sem reabrir esses arquivos; só os novos e os alterados
+    são lidos, e os que saíram da pasta deixam a saída. Com `unir_colunas`,
+    o cabeçalho dos arquivos inalterados também vem do manifesto.
+    """
     progress = pyqtSignal(int)
     concluido = pyqtSignal(str)
     erro = pyqtSignal(str)
     atualizar_status = pyqtSignal(int, str)
 
-    def __init__(self, arquivos, pasta_saida, nome_arquivo, colunas_selecionadas):
+    def __init__(self, arquivos, pasta_saida, nome_arquivo, colunas_selecionadas, workers=1,
+                 reader_backend="xml", alinhar_cabecalho=False, unir_colunas=False, arquivo_base=None,
+                 incremental=False):
         super().__init__()
         self.arquivos = arquivos
         self.pasta_saida = pasta_saida
         self.nome_arquivo = nome_arquivo
         self.colunas_selecionadas = sorted(colunas_selecionadas)
+        self.workers = workers
+        self.reader_backend = reader_backend
+        self.alinhar_cabecalho = alinhar_cabecalho or unir_colunas
+        self.unir_colunas = unir_colunas
+        self.arquivo_base = arquivo_base or (arquivos[0] if arquivos else None)
+        self.nomes_saida = None
+        self.colunas_novas = []
+        self.incremental = incremental
+        self._manifesto = None
+        self._cabecalhos = {}
+        self._reaproveitados = {}
+        self._ignorados = set()
+        self._saida_anterior = None
+        self._proxima_linha = 1
         self._cancelar = False
+        self.cabecalho_base = None
+        self.titulos_base = []
         self.estilos_base = None
         self.larguras_colunas = None
         self.wb_saida = None
@@ -26,50 +198,69 @@ class PlanilhaMesclagemWorker(QObject):
         self.caminho_saida = None
 
     def _carregar_estilos_base(self, arquivo_base):
-        """Carrega estilos da planilha base para aplicar na saída"""
+        """
+        Carrega cabeçalho, estilos e larguras da planilha base para a saída.
+        Sem o cabeçalho as colunas não podem ser localizadas, então um erro
+        ao lê-lo interrompe a mesclagem; só as larguras são opcionais.
+        """
+        try:
+            wb = load_workbook(arquivo_base, read_only=True)
+        except Exception as e:
+            raise ValueError(f"Não foi possível ler o cabeçalho do arquivo base: {e}") from e
         try:
-            wb = load_workbook(arquivo_base)
             ws = wb.active
-            
-            self.larguras_colunas = {}
+            with closing(ws.iter_rows(min_row=1, max_row=1)) as linhas:
+                cabecalho = next(linhas, ())
+            self.titulos_base = [_titulo_coluna(cell.value) for cell in cabecalho]
+
+            self.cabecalho_base = {}
             self.estilos_base = {}
-            
             for col in self.colunas_selecionadas:
-                col_letter = get_column_letter(col + 1)
-                
-                # Obter o valor do cabeçalho da coluna
-                nome_coluna = ws.cell(row=1, column=col + 1).value
+                if col >= len(cabecalho) or cabecalho[col].value is None:
+                    continue
+                cell = cabecalho[col]
 
-                # Ignorar colunas com nome "None" ou valor None
-                if nome_coluna is None or (str(nome_coluna).strip() == "None"):
-                    logging.info(f"Ignorando coluna {col_letter} com nome: {nome_coluna}")
+                # Colunas sem nome (ou com o nome "None") ficam com o título vazio e sem estilo
+                if _titulo_coluna(cell.value) is None:
+                    logging.info(f"Ignorando coluna {get_column_letter(col + 1)} com nome: {cell.value}")
                     continue
-                
-                # Largura da coluna
-                if col_letter in ws.column_dimensions:
-                    self.larguras_colunas[col_letter] = ws.column_dimensions[col_letter].width
-                
-                # Estilo da célula
-                cell = ws.cell(row=1, column=col + 1)
-                if cell.style:
-                    self.estilos_base[col] = cell.style
-            
+                self.cabecalho_base[col] = cell.value
+                if cell.has_style:
+                    self.estilos_base[col] = {
+                        atributo: copy(getattr(cell, atributo))
+                        for atributo in ('font', 'fill', 'border', 'alignment', 'number_format', 'protection')
+                    }
+            titulo = ws.title
+        except Exception as e:
+            raise ValueError(f"Não foi possível ler o cabeçalho do arquivo base: {e}") from e
+        finally:
             wb.close()
+
+        try:
+            # Somente leitura não expõe column_dimensions; as larguras vêm direto do XML da aba
+            with PlanilhaXlsx(arquivo_base) as planilha:
+                larguras = planilha[titulo].larguras_colunas
+            self.larguras_colunas = {col: larguras[col] for col in self.colunas_selecionadas if col in larguras}
         except Exception as e:
-            logging.error(f"Erro ao carregar estilos base: {str(e)}")
+            logging.error(f"Erro ao carregar larguras do arquivo base: {str(e)}")
 
     def _aplicar_estilos(self):
-        """Aplica estilos carregados na planilha de saída"""
+        """Define as larguras e grava o cabeçalho estilizado; precisa vir antes da primeira linha de dados"""
         try:
-            if self.larguras_colunas:
-                for col, width in self.larguras_colunas.items():
-                    if width and col in self.ws_saida.column_dimensions:
-                        self.ws_saida.column_dimensions[col].width = width
-
-            if self.estilos_base and self.ws_saida.max_row >= 1:
-                for col_idx, style in self.estilos_base.items():
-                    if col_idx < len(self.ws_saida[1]):
-                        self.ws_saida.cell(row=1, column=col_idx+1).style = style
+            for posicao, col in enumerate(self.colunas_selecionadas, start=1):
+                largura = (self.larguras_colunas or {}).get(col)
+                if largura:
+                    self.ws_saida.column_dimensions[get_column_letter(posicao)].width = largura
+
+            if self.cabecalho_base or self.colunas_novas:
+                linha = []
+                for col in self.colunas_selecionadas:
+                    cell = WriteOnlyCell(self.ws_saida, value=(self.cabecalho_base or {}).get(col))
+                    for atributo, valor in (self.estilos_base or {}).get(col, {}).items():
+                        setattr(cell, atributo, valor)
+                    linha.append(cell)
+                self.ws_saida.append(linha + list(self.colunas_novas))
+                self._proxima_linha = 2
         except Exception as e:
             logging.error(f"Erro ao aplicar estilos: {str(e)}")
 
@@ -89,47 +280,55 @@ class PlanilhaMesclagemWorker(QObject):
         """Método principal que executa o processo de mesclagem"""
         try:
             self.caminho_saida = os.path.join(self.pasta_saida, f"{self.nome_arquivo}.xlsx")
-            self.wb_saida = Workbook()
-            self.ws_saida = self.wb_saida.active
-
-            if self.arquivos:
-                self._carregar_estilos_base(self.arquivos[0])
-                self._aplicar_estilos()
-
-            total_arquivos = len(self.arquivos)
-            for idx, arquivo in enumerate(self.arquivos):
-                if self._cancelar:
-                    break
+            # Somente escrita: as linhas vão direto para o arquivo temporário do openpyxl,
+            # e a memória não cresce com o número de arquivos mesclados
+            self.wb_saida = Workbook(write_only=True)
+            self.ws_saida = self.wb_saida.create_sheet("Sheet")
 
-                self.atualizar_status.emit(idx, "Processando...")
-                
-                try:
-                    wb_entrada = load_workbook(arquivo, read_only=True, data_only=True)
-                    ws_entrada = wb_entrada.active
-                    
-                    for row in ws_entrada.iter_rows(min_row=2, values_only=True):
-                        if self._cancelar:
-                            break
-                            
-                        nova_linha = [row[col] if col < len(row) else "" for col in self.colunas_selecionadas]
-                        self.ws_saida.append(nova_linha)
-                    
-                    wb_entrada.close()
-                    self.progress.emit(int((idx + 1) / total_arquivos * 100))
-                    self.atualizar_status.emit(idx, "Concluído")
+            if self.arquivo_base:
+                self._carregar_estilos_base(self.arquivo_base)
+            # A saída de uma mesclagem anterior costuma estar na mesma pasta dos arquivos
+            self._ignorados = {
+                idx for idx, arquivo in enumerate(self.arquivos)
+                if os.path.abspath(arquivo) == os.path.abspath(self.caminho_saida)
+            }
+            if self.incremental:
+                # Aberto antes da união de colunas, que reaproveita os cabeçalhos gravados nele
+                self._manifesto = ManifestoMesclagem(self.caminho_saida)
+            if self.alinhar_cabecalho:
+                self.nomes_saida = [(self.cabecalho_base or {}).get(col) for col in self.colunas_selecionadas]
+                if self.unir_colunas:
+                    self.colunas_novas = self._buscar_colunas_novas()
+                    self.nomes_saida += self.colunas_novas
+            self._aplicar_estilos()
+            if self.incremental:
+                self._abrir_manifesto()
 
-                except Exception as e:
-                    self.atualizar_status.emit(idx, f"Erro: {str(e)[:30]}")
-                    logging.error(f"Erro no arquivo {arquivo}: {str(e)}")
+            try:
+                if self.workers > 1 and len(self.arquivos) - len(self._reaproveitados) - len(self._ignorados) > 1:
+                    self._mesclar_em_paralelo()
+                else:
+                    self._mesclar_em_sequencia()
+            finally:
+                # A saída anterior precisa estar fechada antes de ser substituída pela nova
+                if self._saida_anterior:
+                    self._saida_anterior.fechar()
 
             if self._cancelar:
                 caminho_parcial = self._salvar_parcialmente()
                 self.concluido.emit(f"Processo cancelado. Arquivo parcial salvo em: {caminho_parcial}" if caminho_parcial 
                                   else "Cancelado mas houve erro ao salvar")
             else:
-                self._aplicar_estilos()
                 self.wb_saida.save(self.caminho_saida)
-                self.concluido.emit(f"Arquivo final salvo em: {self.caminho_saida}")
+                if self._manifesto:
+                    self._manifesto.salvar()
+                    lidos = len(self._manifesto.atuais) - len(self._reaproveitados)
+                    self.concluido.emit(
+                        f"Arquivo final salvo em: {self.caminho_saida} "
+                        f"({len(self._reaproveitados)} arquivos sem alterações, {lidos} lidos)"
+                    )
+                else:
+                    self.concluido.emit(f"Arquivo final salvo em: {self.caminho_saida}")
 
         except Exception as e:
             self.erro.emit(f"Erro crítico: {str(e)}")
@@ -138,6 +337,208 @@ class PlanilhaMesclagemWorker(QObject):
             if self.wb_saida:
                 self.wb_saida.close()
 
+    def _mesclar_em_sequencia(self):
+        total_arquivos = len(self.arquivos)
+        for idx, arquivo in enumerate(self.arquivos):
+            if self._cancelar:
+                break
+            if idx in self._reaproveitados or idx in self._ignorados:
+                self._sem_leitura(idx)
+                continue
+
+            self.atualizar_status.emit(idx, "Processando...")
+            
+            wb_entrada = None
+            try:
+                wb_entrada = _abrir_entrada(arquivo, self.reader_backend)
+                colunas = _colunas_entrada(wb_entrada.active, self.colunas_selecionadas, self.nomes_saida)
+                self._gravar(idx, _linhas_selecionadas(wb_entrada.active, colunas))
+                
+                self.progress.emit(int((idx + 1) / total_arquivos * 100))
+                self.atualizar_status.emit(idx, self._status_concluido(arquivo, colunas))
+
+            except Exception as e:
+                self.atualizar_status.emit(idx, f"Erro: {str(e)[:30]}")
+                logging.error(f"Erro no arquivo {arquivo}: {str(e)}")
+            finally:
+                if wb_entrada:
+                    wb_entrada.close()
+
+    def _mesclar_em_paralelo(self):
+        """Lê os arquivos no pool de processos e anexa as linhas à saída na ordem original"""
+        total_arquivos = len(self.arquivos)
+        pasta_temp = tempfile.mkdtemp(prefix="mescla_planilhas_")
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, total_arquivos))
+        # Arquivos reaproveitados da saída anterior ou ignorados não são enviados ao pool (futuro None)
+        futures = [
+            None if idx in self._reaproveitados or idx in self._ignorados
+            else executor.submit(
+                _ler_arquivo_worker, arquivo, self.colunas_selecionadas, pasta_temp, self.reader_backend, self.nomes_saida
+            )
+            for idx, arquivo in enumerate(self.arquivos)
+        ]
+        pending = {future for future in futures if future is not None}
+        proximo = 0
+        iniciados = 0
+
+        try:
+            while proximo < total_arquivos and not self._cancelar:
+                if pending:
+                    _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                while proximo < total_arquivos and not self._cancelar:
+                    # O pool pega os arquivos na ordem de envio, então os iniciados formam um prefixo da lista
+                    while iniciados < total_arquivos and (
+                        futures[iniciados] is None or futures[iniciados].running() or futures[iniciados].done()
+                    ):
+                        if futures[iniciados] is not None:
+                            self.atualizar_status.emit(iniciados, "Processando...")
+                        iniciados += 1
+
+                    # Os arquivos entram na saída na ordem original, mesmo que terminem fora de ordem
+                    if futures[proximo] is None:
+                        self._sem_leitura(proximo)
+                    elif futures[proximo].done():
+                        self._anexar_resultado(proximo, futures[proximo])
+                    else:
+                        break
+                    proximo += 1
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            shutil.rmtree(pasta_temp, ignore_errors=True)
+
+    def _anexar_resultado(self, idx, future):
+        try:
+            caminho, colunas = future.result()
+            linhas = ler_linhas(caminho)
+            try:
+                self._gravar(idx, linhas)
+            finally:
+                linhas.close()
+                os.remove(caminho)
+
+            self.progress.emit(int((idx + 1) / len(self.arquivos) * 100))
+            self.atualizar_status.emit(idx, self._status_concluido(self.arquivos[idx], colunas))
+        except Exception as e:
+            self.atualizar_status.emit(idx, f"Erro: {str(e)[:30]}")
+            logging.error(f"Erro no arquivo {self.arquivos[idx]}: {str(e)}")
+
+    def _gravar(self, idx, linhas):
+        """Anexa as linhas de um arquivo à saída e, na mesclagem incremental, registra o intervalo ocupado"""
+        inicio = self._proxima_linha
+        for nova_linha in linhas:
+            if self._cancelar:
+                return
+            self.ws_saida.append(nova_linha)
+            self._proxima_linha += 1
+        if self._manifesto:
+            entrada = self._reaproveitados.get(idx)
+            cabecalho = self._cabecalhos.get(idx) or (entrada.get('cabecalho') if entrada else None)
+            self._manifesto.registrar(
+                self.arquivos[idx], inicio, self._proxima_linha - 1, entrada['hash'] if entrada else None, cabecalho
+            )
+
+    def _abrir_manifesto(self):
+        identidade = {
+            'colunas': self.colunas_selecionadas,
+            'alinhar_cabecalho': self.alinhar_cabecalho,
+            'cabecalho': [
+                None if valor is None else str(valor)
+                for valor in [(self.cabecalho_base or {}).get(col) for col in self.colunas_selecionadas]
+                + list(self.colunas_novas)
+            ],
+        }
+        self._manifesto.definir_identidade(identidade)
+        if not self._manifesto.anteriores:
+            logging.info("Sem manifesto válido para a saída; todos os arquivos serão lidos")
+            return
+
+        try:
+            for idx, arquivo in enumerate(self.arquivos):
+                entrada = self._manifesto.reaproveitavel(arquivo)
+                if entrada:
+                    self._reaproveitados[idx] = entrada
+            if self._reaproveitados:
+                self._saida_anterior = _SaidaAnterior(self.caminho_saida)
+        except Exception as e:
+            logging.error(f"Erro ao reaproveitar a saída anterior, todos os arquivos serão lidos: {str(e)}")
+            self._reaproveitados = {}
+            return
+
+        atuais = {os.path.abspath(arquivo) for arquivo in self.arquivos}
+        removidos = [arquivo for arquivo in self._manifesto.anteriores if arquivo not in atuais]
+        if removidos:
+            logging.info(f"{len(removidos)} arquivos do manifesto não estão mais na lista e saem da saída")
+
+    def _sem_leitura(self, idx):
+        """Arquivo que não é lido: reaproveitado da saída anterior ou a própria saída"""
+        if idx in self._ignorados:
+            self.atualizar_status.emit(idx, "Ignorado (arquivo de saída)")
+            return
+        inicio, fim = self._reaproveitados[idx]['linhas']
+        try:
+            self._gravar(idx, self._saida_anterior.linhas(inicio, fim))
+            self.progress.emit(int((idx + 1) / len(self.arquivos) * 100))
+            self.atualizar_status.emit(idx, "Sem alterações")
+        except Exception as e:
+            self.atualizar_status.emit(idx, f"Erro: {str(e)[:30]}")
+            logging.error(f"Erro ao copiar {self.arquivos[idx]} da saída anterior: {str(e)}")
+
+    def _buscar_colunas_novas(self):
+        """
+        Nomes que aparecem no cabeçalho de algum arquivo e não estão no base,
+        na ordem em que surgem. As colunas do base que não foram selecionadas
+        continuam de fora.
+        """
+        vistos = {_normalizar_nome(nome) for nome in [*self.titulos_base, *self.nomes_saida] if nome is not None}
+        novas = []
+        for idx, arquivo in enumerate(self.arquivos):
+            if self._cancelar:
+                break
+            if idx in self._ignorados:
+                continue
+            cabecalho = self._cabecalho_arquivo(arquivo)
+            if cabecalho is None:
+                continue  # o erro aparece no status quando o arquivo for mesclado
+            self._cabecalhos[idx] = cabecalho
+            for valor in cabecalho:
+                if valor is not None and _normalizar_nome(valor) not in vistos:
+                    vistos.add(_normalizar_nome(valor))
+                    novas.append(valor)
+        if novas:
+            logging.info(f"Colunas acrescentadas à mesclagem: {', '.join(map(str, novas))}")
+        return novas
+
+    def _cabecalho_arquivo(self, arquivo):
+        """Cabeçalho do arquivo: o do manifesto, se ele não mudou, ou lido do arquivo; None se não abrir"""
+        if self._manifesto:
+            try:
+                cabecalho = self._manifesto.cabecalho(arquivo)
+            except OSError:
+                cabecalho = None
+            if cabecalho is not None:
+                return cabecalho
+        try:
+            wb = _abrir_entrada(arquivo, self.reader_backend)
+        except Exception:
+            return None
+        try:
+            return _cabecalho_gravavel(_ler_cabecalho(wb.active))
+        finally:
+            wb.close()
+
+    def _status_concluido(self, arquivo, colunas):
+        if not self.alinhar_cabecalho:
+            return "Concluído"
+        ausentes = [
+            nome for nome, col in zip(self.nomes_saida[:len(self.colunas_selecionadas)], colunas)
+            if nome is not None and col is None
+        ]
+        if not ausentes:
+            return "Concluído"
+        logging.warning(f"{arquivo} sem as colunas: {', '.join(map(str, ausentes))}")
+        return f"Concluído, sem {len(ausentes)} coluna(s)"
+
     def cancelar(self):
         """Marca o processo para cancelamento"""
         self._cancelar = True
@@ -1,30 +1,81 @@
-import re
 import os
 import gc
+import time
+import shutil
 import logging
-import unicodedata
-from datetime import time as dt_time, datetime as dt_datetime
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, NamedStyle
-from openpyxl.utils import datetime as xl_datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from operator import itemgetter
+from openpyxl.styles import NamedStyle
 from PyQt6.QtCore import QThread, pyqtSignal
+from services.LeituraAgitel import LeitorAgitel, REGRAS_REGIAO, VERSAO_CONVERSAO, _inicializar_worker, _processar_aba_worker
+from utils.externalSort import OrdenadorExterno, OrdenadorSQLite, gravar_linhas, ler_linhas
+from utils.sheetCache import CacheAbas
+from services.ResumoAgitel import ResumoAgitel
+from services.TarifacaoAgitel import TarifadorAgitel, carregar_tarifas
+from utils.outputSinks import SAIDAS
+from utils.dedupIndex import IndiceDuplicatas
+from utils.progressMetrics import MetricasProgresso
+from utils.callStore import BaseChamadas
+from utils.checkpoint import PontoControle
 
-class ProcessadorAgitel(QThread):
+# Campos que identificam uma chamada: Data, Origem, Destino, Duração e Valor
+_chave_duplicata = itemgetter(0, 1, 4, 5, 7)
+
+
+def _chave_regiao(row):
+    return str(row[3]).lower() if row[3] else ""
+
+
+class ProcessadorAgitel(LeitorAgitel, QThread):
     progressUpdated = pyqtSignal(int)
     processFinished = pyqtSignal(str)
     errorOccurred = pyqtSignal(str)
     logUpdated = pyqtSignal(str)
+    metricsUpdated = pyqtSignal(dict)
 
     COLUNAS_SAIDA = [
         'Data', 'Origem', 'Serviço', 'Região', 
         'Destino', 'Duração', 'Duração (minutos)', 'Valor'
     ]
-
-    def __init__(self, file_path, equalize):
-        super().__init__()
+    TIPOS_SAIDA = ['data', 'texto', 'texto', 'texto', 'texto', 'duracao', 'numero', 'numero']
+
+    def __init__(self, file_path, equalize, sort_run_size=200_000, chunk_size=5000, workers=1,
+                 reader_backend="xml", conversion_mode="linha", use_cache=False, cache_dir=None,
+                 output_format="xlsx", summary=False, tagged_run_path=None, memory_budget_mb=None,
+                 spill_backend="arquivos", deduplicate=False, dedup_path=None, store_path=None,
+                 tariff_path=None, checkpoint=False):
+        super().__init__(chunk_size=chunk_size, reader_backend=reader_backend, conversion_mode=conversion_mode,
+                         region_rules=REGRAS_REGIAO if equalize else None)
         self.file_path = file_path
         self.equalize = equalize
-        self._interrupted = False
+        self.sort_run_size = sort_run_size
+        self.workers = workers
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.output_format = output_format
+        self.summary = summary
+        self.tagged_run_path = tagged_run_path
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_backend = spill_backend
+        self.deduplicate = deduplicate
+        self.dedup_path = dedup_path
+        self.store_path = store_path
+        self.tariff_path = tariff_path
+        self.checkpoint = checkpoint
+        self._checkpoint = None
+        self._checkpoint_sheets = {}
+        self._dedup = None
+        self._store = None
+        self._tarifador = None
+        self._metrics = None
+        self._row_estimates = {}
+        self._parallel_used = False
+        self._cache = None
+        self._cache_keys = {}
+        self._sheet_progress = (0, 0)
+        self._currency_cache_workers = (0, 0)
         self._setup_styles()
 
     def _setup_styles(self):
@@ -37,9 +88,9 @@ class ProcessadorAgitel(QThread):
 
     def run(self):
         try:
-            wb = load_workbook(self.file_path, read_only=True)
+            self._load_tariffs()
+            wb = self._open_workbook(self.file_path)
             valid_sheets = []
-            batch_counter = 0
 
             primeira_aba = wb.worksheets[0].title.lower() if wb.worksheets else ""
             ignorar_primeira = "resumo" in primeira_aba
@@ -50,41 +101,54 @@ class ProcessadorAgitel(QThread):
                 if ignorar_primeira and sheet == wb.worksheets[0]:
                     continue
                     
-                if self._find_header_row(sheet):
+                try:
+                    plan = self._plan_sheet(sheet)
+                except ValueError as e:
+                    self.logUpdated.emit(f"Aviso: {sheet.title} ignorada ({e})")
+                    continue
+
+                if plan:
                     valid_sheets.append(sheet)
                 else:
                     self.logUpdated.emit(f"Aviso: {sheet.title} ignorada (cabeçalho não encontrado)")
 
-            total_sheets = len(valid_sheets)
-            progress_per_sheet = 100 / total_sheets if total_sheets > 0 else 0
+            self._row_estimates = {sheet.title: self._estimate_rows(sheet) for sheet in valid_sheets}
+            self._metrics = MetricasProgresso(sum(self._row_estimates.values()))
 
-            output_wb = Workbook()
-            output_sheet = output_wb.active
-            self._create_header(output_wb, output_sheet)
+            if self.use_cache:
+                self._open_cache(valid_sheets)
+            if self.checkpoint:
+                self._open_checkpoint(valid_sheets)
 
-            for index, sheet in enumerate(valid_sheets, 1):
-                if self._interrupted:
-                    break
-
-                self.logUpdated.emit(f"Processando: {sheet.title}")
-                
-                for chunk in self._process_sheet(sheet):
-                    for row in chunk:
-                        output_sheet.append(row)
+            ordenador = self._create_sorter()
+            if self.deduplicate:
+                nome = os.path.basename(self.file_path)
+                self._dedup = IndiceDuplicatas(_chave_duplicata, self.dedup_path, origem=lambda row: nome,
+                                               origens_reprocessadas=[nome])
+            to_convert = [sheet for sheet in valid_sheets if not self._saved_path(sheet.title)]
 
-                self.progressUpdated.emit(int(index * progress_per_sheet))
-
-                batch_counter += 1
-                if batch_counter >= 10 or index == total_sheets:
-                    self._clean_and_sort_output(output_sheet)
-                    batch_counter = 0
-
-            self._apply_final_formatting(output_sheet)
-            if self.equalize:
-                self._equalize_regiao(output_sheet)
+            if self.workers > 1 and len(to_convert) > 1:
+                self._process_sheets_parallel([sheet.title for sheet in valid_sheets], ordenador)
+            else:
+                self._process_sheets_serial(valid_sheets, ordenador)
+            if self._interrupted:
+                # Sem gravar uma saída parcial; as abas concluídas ficam no checkpoint
+                self.processFinished.emit(self._interrupted_message(len(valid_sheets)))
+                return
+            self._log_currency_cache()
+            self._log_sort_spill(ordenador)
 
             output_path = self._get_output_path()
-            output_wb.save(output_path)
+            if self.store_path:
+                self._store = BaseChamadas(self.store_path)
+                self._store.remover_arquivo(self.file_path)
+            self._write_output(ordenador.ordenados(), output_path)
+            self._finish_dedup()
+            self._finish_store()
+            self._finish_tariff()
+            self._log_stage_times()
+            if self._checkpoint:
+                self._checkpoint.descartar()
             self.processFinished.emit(f"Arquivo salvo em: {output_path}")
 
         except Exception as e:
@@ -92,188 +156,377 @@ class ProcessadorAgitel(QThread):
             logging.exception("Erro durante o processamento")
         finally:
             if 'wb' in locals(): wb.close()
-            if 'output_wb' in locals(): output_wb.close()
+            if 'ordenador' in locals(): ordenador.fechar()
+            if self._store: self._store.fechar()
             gc.collect()
 
-    def _clean_and_sort_output(self, sheet):
-        try:
-            all_rows = []
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if any(cell not in (None, "", 0) for cell in row):
-                    all_rows.append(row)
+    def _create_sorter(self):
+        """
+        Ordenação em memória que transborda para disco: runs temporários
+        intercalados no final ou, com spill_backend="sqlite", um banco SQLite.
+        """
+        limit = self.memory_budget_mb * 1024 * 1024 if self.memory_budget_mb else None
+        if self.spill_backend == "sqlite":
+            return OrdenadorSQLite(_chave_regiao, linhas_por_lote=self.sort_run_size, limite_memoria=limit)
+        return OrdenadorExterno(_chave_regiao, linhas_por_lote=self.sort_run_size, limite_memoria=limit)
+
+    def _log_sort_spill(self, ordenador):
+        """Informa se a ordenação foi para o disco; só com memory_budget_mb isso é o limite de memória."""
+        if getattr(ordenador, 'total_runs', 0):
+            detail = f"ordenação em {ordenador.total_runs} runs em disco"
+        elif getattr(ordenador, 'transbordou', False):
+            detail = "linhas ordenadas em disco pelo SQLite"
+        else:
+            return
+        if self.memory_budget_mb:
+            self.logUpdated.emit(f"Limite de memória atingido: {detail}")
+        else:
+            self.logUpdated.emit(f"{detail[0].upper()}{detail[1:]} (blocos de {self.sort_run_size} linhas)")
 
-            all_rows.sort(key=lambda x: str(x[3]).lower() if x[3] else "")
+    def _process_sheets_serial(self, sheets, ordenador):
+        total_sheets = len(sheets)
+        progress_per_sheet = 100 / total_sheets if total_sheets > 0 else 0
 
-            sheet.delete_rows(2, sheet.max_row)
-            for row in all_rows:
-                sheet.append(row)
+        for index, sheet in enumerate(sheets, 1):
+            if self._interrupted:
+                break
 
-        except Exception as e:
-            self.logUpdated.emit(f"Erro na organização: {str(e)[:50]}")
+            self._sheet_progress = ((index - 1) * progress_per_sheet, progress_per_sheet)
+
+            if self._saved_path(sheet.title):
+                self._load_saved_sheet(sheet.title, ordenador)
+            else:
+                self.logUpdated.emit(f"Processando: {sheet.title}")
+                self._convert_sheet(sheet, ordenador)
 
-    def _apply_final_formatting(self, sheet):
-        for row in sheet.iter_rows(min_row=2):
-            cell = row[5]
-            cell.number_format = 'hh:mm:ss'
+            self.progressUpdated.emit(int(index * progress_per_sheet))
 
-    def _process_sheet(self, sheet):
-        header_row = self._find_header_row(sheet)
-        if not header_row:
+    def _convert_sheet(self, sheet, ordenador):
+        if sheet.title not in self._cache_keys and self._checkpoint is None:
+            for chunk in self._process_sheet(sheet):
+                self._add_rows(chunk, ordenador)
             return
 
-        indices = self._get_column_indices(header_row)
-        start_row = header_row[0].row + 1
-        chunk = []
+        # Grava as linhas convertidas junto com a ordenação, para reaproveitar na próxima execução
+        fd, caminho = (self._checkpoint or self._cache).novo_temporario()
+        try:
+            with os.fdopen(fd, "wb") as arquivo:
+                for chunk in self._process_sheet(sheet):
+                    gravar_linhas(arquivo, chunk)
+                    self._add_rows(chunk, ordenador)
+            if not self._interrupted:
+                self._save_sheet_rows(sheet.title, caminho)
+        finally:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def _save_sheet_rows(self, title, caminho):
+        """Guarda as linhas convertidas de uma aba concluída no cache e/ou no checkpoint (move o arquivo)."""
+        key = self._cache_keys.get(title)
+        if key is not None:
+            if self._checkpoint is None:
+                self._cache.guardar(key, caminho)
+                return
+            fd, copia = self._cache.novo_temporario()
+            os.close(fd)
+            shutil.copyfile(caminho, copia)
+            self._cache.guardar(key, copia)
+        if self._checkpoint is not None:
+            self._checkpoint.registrar(title, caminho)
+
+    def _saved_path(self, title):
+        return self._checkpoint_sheets.get(title) or self._cached_path(title)
+
+    def _load_saved_sheet(self, title, ordenador):
+        if title in self._checkpoint_sheets:
+            self.logUpdated.emit(f"Retomando do checkpoint: {title}")
+        else:
+            self.logUpdated.emit(f"Carregando do cache: {title}")
+        self._add_rows(ler_linhas(self._saved_path(title)), ordenador)
+        self.rows_read += self._row_estimates[title]
+        self._emit_metrics(force=True)
+
+    def _add_rows(self, rows, ordenador):
+        rows = (row for row in rows if not self._is_empty_row(row))
+        if self._dedup is not None:
+            rows = self._dedup.filtrar(rows)
+        with self.stage_times.medir("ordenação"):
+            ordenador.adicionar_varias(rows)
+
+    def _estimate_rows(self, sheet):
+        """Linhas de dados de uma aba segundo a dimensão declarada, para o ETA."""
+        return max((sheet.max_row or 0) - self._sheet_plans[sheet.title].header_row, 0)
+
+    def _emit_metrics(self, force=False):
+        if self._metrics is None:
+            return
+        metrics = self._metrics.atualizar(self.rows_read, self.bytes_read, force)
+        if metrics:
+            self.metricsUpdated.emit(metrics)
 
-        rows = list(sheet.iter_rows(min_row=start_row, values_only=True))
-        total_rows = len(rows)
-        current_index = 0
+    def _log_stage_times(self):
+        if self._interrupted or self._metrics is None:
+            return
+        metrics = self._metrics.atualizar(self.rows_read, self.bytes_read, forcar=True)
+        self.metricsUpdated.emit(metrics)
+        note = " (leitura e conversão somadas entre os processos)" if self._parallel_used else ""
+        self.logUpdated.emit(
+            f"{metrics['linhas']} linhas em {metrics['decorrido']:.1f}s "
+            f"({metrics['linhas_por_segundo']:.0f} linhas/s). Tempos: {self.stage_times.resumo()}{note}"
+        )
+
+    def _finish_dedup(self):
+        if self._dedup is None or self._interrupted:
+            return
+        self.logUpdated.emit(f"Chamadas duplicadas removidas: {self._dedup.removidas}")
+        if self._dedup.removidas and not self._dedup.mantidas:
+            self.logUpdated.emit("Aviso: todas as chamadas já estavam no índice de execuções anteriores; a saída ficou vazia")
+        if self.dedup_path:
+            self._dedup.salvar()
+            self.logUpdated.emit(f"Índice de chamadas salvo ({len(self._dedup)} registros)")
+
+    def _finish_store(self):
+        if self._store is None or self._interrupted:
+            return
+        self._store.confirmar()
+        self.logUpdated.emit(f"Base de consultas atualizada: {os.path.basename(self.store_path)}")
 
-        while current_index < total_rows:
-            if self._interrupted:
-                return
+    def _load_tariffs(self):
+        if self.tariff_path:
+            self._tarifador = TarifadorAgitel(carregar_tarifas(self.tariff_path))
+            self.logUpdated.emit(f"Tabela de tarifas carregada: {os.path.basename(self.tariff_path)}")
 
-            row = rows[current_index]
-            current_index += 1
+    def _finish_tariff(self):
+        if self._tarifador is None or self._interrupted:
+            return
+        diferenca = f"{self._tarifador.diferenca_total:.2f}".replace(".", ",")
+        self.logUpdated.emit(
+            f"Tarifação: {self._tarifador.divergentes} chamadas com valor divergente "
+            f"(diferença total R$ {diferenca}), {self._tarifador.sem_tarifa} sem tarifa"
+        )
+
+    def _process_sheets_parallel(self, titles, ordenador):
+        total_sheets = len(titles)
+        self._parallel_used = True
+        self.logUpdated.emit(f"Processando {total_sheets} abas em {min(self.workers, total_sheets)} processos")
+
+        # Os workers gravam as linhas onde elas vão ficar guardadas, para o arquivo ser só movido
+        saved_rows = self._checkpoint or self._cache
+        pasta_temp = saved_rows.pasta if saved_rows else None
+
+        # stop() não alcança os processos do pool: o evento é conferido por eles a cada bloco
+        manager = multiprocessing.Manager()
+        parar = manager.Event()
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, total_sheets),
+            initializer=_inicializar_worker,
+            initargs=(self.file_path, self._reader_options())
+        )
+        # Abas já presentes no cache ou no checkpoint não são enviadas ao pool (futuro None)
+        futures = [
+            None if self._saved_path(title)
+            else executor.submit(_processar_aba_worker, title, self._sheet_plans[title], pasta_temp, parar)
+            for title in titles
+        ]
+        pending = {future for future in futures if future is not None}
+        next_index = 0
 
-            processed_row = self._process_row(row, indices)
-            if processed_row:
-                chunk.append(processed_row)
-        if chunk:
-            yield chunk
+        try:
+            while next_index < total_sheets and not self._interrupted:
+                if pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    if done:
+                        self.progressUpdated.emit(int((total_sheets - len(pending)) * 100 / total_sheets))
+
+                # As abas são intercaladas na ordem original, mesmo que terminem fora de ordem
+                while (next_index < total_sheets and not self._interrupted
+                       and (futures[next_index] is None or futures[next_index].done())):
+                    title = titles[next_index]
+                    if futures[next_index] is None:
+                        self._load_saved_sheet(title, ordenador)
+                    else:
+                        self._merge_worker_result(title, futures[next_index], ordenador)
+                    next_index += 1
+        finally:
+            if self._interrupted:
+                parar.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            manager.shutdown()
+            self._keep_finished_sheets(titles[next_index:], futures[next_index:])
+
+    def _keep_finished_sheets(self, titles, futures):
+        """
+        Abas que os processos terminaram mas não foram intercaladas (interrupção
+        ou erro): as linhas vão para o checkpoint e/ou cache, como no modo serial.
+        """
+        for title, future in zip(titles, futures):
+            if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+                continue
+            result = future.result()
+            if result is None:
+                continue
+            caminho = result[0]
+            try:
+                self._save_sheet_rows(title, caminho)
+            except OSError:
+                logging.exception(f"Erro ao guardar a aba {title}")
+            finally:
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+    def _merge_worker_result(self, title, future, ordenador):
+        caminho, _, messages, stats = future.result()
+        acertos, falhas = stats['cache_moeda']
+        self._currency_cache_workers = (
+            self._currency_cache_workers[0] + acertos, self._currency_cache_workers[1] + falhas
+        )
+        self.rows_read += stats['linhas_lidas']
+        self.bytes_read += stats['bytes']
+        self.stage_times.somar(stats['tempos'])
+        self._emit_metrics(force=True)
+        try:
+            self.logUpdated.emit(f"Processando: {title}")
+            for message in messages:
+                self.logUpdated.emit(message)
+            self._add_rows(ler_linhas(caminho), ordenador)
+            self._save_sheet_rows(title, caminho)
+        finally:
+            if os.path.exists(caminho):
+                os.remove(caminho)
 
-    def _process_row(self, row, indices):
+    def _open_cache(self, sheets):
         try:
-            data = self._convert_date(row[indices.get('data', -1)]) or ""
-            origem = str(row[indices.get('origem', -1)] or "").strip()
-            destino = str(row[indices.get('destino', -1)] or "").strip()
-            
-            return [
-                data,
-                origem,
-                str(row[indices.get('servico', -1)] or ""),
-                str(row[indices.get('regiao', -1)] or ""),
-                destino,
-                self._convert_duration(row[indices.get('duracao', -1)]),
-                self._duration_to_minutes(row[indices.get('duracao', -1)]),
-                self._parse_currency(row[indices.get('preco', -1)])
-            ]
+            self._cache = CacheAbas(self.cache_dir, versao=VERSAO_CONVERSAO)
+            self._cache_keys = self._cache.chaves(self.file_path, variante=repr(self.region_rules))
         except Exception as e:
-            self.logUpdated.emit(f"Linha ignorada: {str(e)[:50]}")
-            return None
+            self._cache, self._cache_keys = None, {}
+            self.logUpdated.emit(f"Aviso: cache de abas indisponível ({e})")
+            return
 
-    def _create_header(self, wb, sheet):
-        sheet.append(self.COLUNAS_SAIDA)
-        for col, title in enumerate(self.COLUNAS_SAIDA, 1):
-            cell = sheet.cell(row=1, column=col)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-        sheet.column_dimensions['F'].number_format = 'hh:mm:ss'
+        reused = sum(1 for sheet in sheets if self._cached_path(sheet.title))
+        self.logUpdated.emit(f"Cache: {reused} de {len(sheets)} abas sem alterações desde a última execução")
 
-    def _get_output_path(self):
-        base, ext = os.path.splitext(self.file_path)
-        return f"{base}_leitura_agitel{ext}"
-
-    def _convert_date(self, value):
-        if isinstance(value, dt_datetime):
-            return xl_datetime.to_excel(value)
-        return value
-
-    def _convert_duration(self, value):
-        if isinstance(value, dt_time):
-            return value.hour/24 + value.minute/1440 + value.second/86400
-        elif isinstance(value, str):
-            try:
-                h, m, s = map(int, value.split(':'))
-                return h/24 + m/1440 + s/86400
-            except:
-                return 0.0
-        return value
-
-    def _duration_to_minutes(self, value):
-        if isinstance(value, dt_time):
-            return round(value.hour * 60 + value.minute + value.second / 60, 1)
-        return 0.0
-
-    def _parse_currency(self, value):
+    def _open_checkpoint(self, sheets):
         try:
-            return float(str(value).replace('R$', '').replace(',', '.').strip())
-        except:
-            return 0.0
-
-    def _equalize_regiao(self, sheet):
-        for row in sheet.iter_rows(min_row=2):
-            cell = row[3]
-            if not cell.value:
-                continue
-                
-            valor = str(cell.value).lower()
-            if "fixo" in valor:
-                cell.value = "Fixo"
-            elif any(x in valor for x in ["movel", "móvel"]):
-                cell.value = "Móvel"
-            elif not valor.strip():
-                cell.value = "Intragrupo"
-
-    def _find_header_row(self, sheet):
-        essential_columns = {'data', 'origem', 'destino', 'duracao', 'preco'}
-        
-        for row in sheet.iter_rows(max_row=20):
-            if self._is_data_row(row):
-                continue
-                
-            found = set()
-            for cell in row:
-                if cell.value:
-                    normalized = self._normalize(str(cell.value))
-                    if normalized in essential_columns:
-                        found.add(normalized)
-            
-            if found >= essential_columns:
-                return row
-        return None
-    
-    def _is_data_row(self, row):
-        data_patterns = 0
-        for cell in row:
-            if isinstance(cell.value, (dt_datetime, int, float)):
-                data_patterns += 1
-            elif isinstance(cell.value, str):
-                if re.match(r"\d{2}/\d{2}/\d{4}", cell.value):
-                    data_patterns += 1
-                elif re.match(r"\d{2}:\d{2}:\d{2}", cell.value):
-                    data_patterns += 1
-                elif "R$" in cell.value:
-                    data_patterns += 1
-        
-        return data_patterns >= 3
-
-    def _get_column_indices(self, header_row):
-        headers = [self._normalize(str(cell.value)) for cell in header_row]
-        mapping = {
-            'data': ['data', 'datachamada', 'datahora', 'datahorario'],
-            'origem': ['origem', 'ramalorigem', 'setor', 'operador'],
-            'servico': ['servico', 'tiposervico', 'serviço', 'tipochamada'],
-            'regiao': ['regiao', 'região', 'localchamada', 'ddd'],
-            'destino': ['destino', 'numerodestino', 'telefone', 'ramaldestino'],
-            'duracao': ['duracao', 'tempochamada', 'tempogasto', 'duraçao'],
-            'preco': ['preco', 'custochamada', 'valor', 'tarifa']
+            self._checkpoint = PontoControle(self.file_path, variante=f"v{VERSAO_CONVERSAO}|{self.region_rules!r}")
+        except OSError as e:
+            self.logUpdated.emit(f"Aviso: checkpoint indisponível ({e})")
+            return
+
+        titles = {sheet.title for sheet in sheets}
+        self._checkpoint_sheets = {
+            title: path for title, path in self._checkpoint.abas_concluidas().items() if title in titles
         }
+        if self._checkpoint_sheets:
+            self.logUpdated.emit(
+                f"Retomando processamento interrompido: {len(self._checkpoint_sheets)} de {len(sheets)} abas já concluídas"
+            )
+
+    def _interrupted_message(self, total_sheets):
+        if self._checkpoint is None:
+            return "Processamento interrompido; nenhum arquivo foi gerado"
+        done = len(self._checkpoint.abas_concluidas())
+        return (
+            f"Processamento interrompido: {done} de {total_sheets} abas guardadas no checkpoint. "
+            "Processe o mesmo arquivo novamente para continuar de onde parou"
+        )
+
+    def _cached_path(self, title):
+        if title not in self._cache_keys:
+            return None
+        return self._cache.caminho(self._cache_keys[title])
+
+    def _log(self, message):
+        self.logUpdated.emit(message)
+
+    def _log_currency_cache(self):
+        acertos, falhas = self.conversor_moeda.estatisticas()
+        acertos += self._currency_cache_workers[0]
+        falhas += self._currency_cache_workers[1]
+        consultas = acertos + falhas
+        if consultas:
+            self.logUpdated.emit(
+                f"Cache de valores: {acertos / consultas:.1%} de acertos "
+                f"({consultas} consultas, {falhas} valores distintos convertidos)"
+            )
+
+    def _output_formats(self):
+        return [
+            self.styles['date'].number_format, None, None, None, None,
+            self.styles['duration'].number_format,
+            self.styles['minutes'].number_format,
+            self.styles['currency'].number_format
+        ]
+
+    def _write_output(self, rows, output_path):
+        # O merge final da ordenação acontece enquanto as linhas são puxadas para gravação
+        started = time.perf_counter()
+        sort_time = 0.0
+        rows = iter(rows)
+        resumo = ResumoAgitel() if self.summary else None
+        # No modo pasta, as linhas ordenadas também vão para um run com o nome do arquivo de origem
+        tagged_run = open(self.tagged_run_path, "wb") if self.tagged_run_path else None
+        source = os.path.basename(self.file_path)
+        tarifador = self._tarifador
+        tariff_time = 0.0
+        columns, types, formats = self.COLUNAS_SAIDA, self.TIPOS_SAIDA, self._output_formats()
+        if tarifador:
+            currency = self.styles['currency'].number_format
+            columns, types = columns + tarifador.COLUNAS, types + tarifador.TIPOS
+            formats = formats + [currency, currency, None]
 
-        indices = {}
-        for key, aliases in mapping.items():
-            for alias in aliases:
-                normalized = self._normalize(alias)
-                if normalized in headers:
-                    indices[key] = headers.index(normalized)
-                    break
-            else:
-                raise ValueError(f"Coluna '{key}' não encontrada")
-        return indices
+        try:
+            with SAIDAS[self.output_format](output_path, columns, types, formats) as saida:
+                while True:
+                    pulled = time.perf_counter()
+                    chunk = list(islice(rows, self.chunk_size))
+                    sort_time += time.perf_counter() - pulled
+                    if not chunk:
+                        break
+                    if resumo:
+                        resumo.adicionar(chunk)
+                    if tagged_run:
+                        gravar_linhas(tagged_run, [list(row) + [source] for row in chunk])
+                    if self._store:
+                        self._store.adicionar(chunk, self.file_path)
+                    if tarifador:
+                        started_tariff = time.perf_counter()
+                        chunk = tarifador.aplicar(chunk)
+                        tariff_time += time.perf_counter() - started_tariff
+                    saida.escrever(chunk)
+
+                caminho_resumo = None
+                if resumo:
+                    caminho_resumo = saida.adicionar_tabela("Resumo", resumo.COLUNAS, resumo.TIPOS, resumo.linhas())
+            # Só depois de fechar a saída: se fechar() falhar, o resumo é removido junto
+            if caminho_resumo:
+                self.logUpdated.emit(f"Resumo gravado em: {os.path.basename(caminho_resumo)}")
+            if saida.datas_descartadas:
+                self.logUpdated.emit(
+                    f"Aviso: {saida.datas_descartadas} datas não reconhecidas foram gravadas vazias na saída"
+                )
+        finally:
+            if tagged_run:
+                tagged_run.close()
+            self.stage_times.adicionar("ordenação", sort_time)
+            if tarifador:
+                self.stage_times.adicionar("tarifação", tariff_time)
+            self.stage_times.adicionar("gravação", time.perf_counter() - started - sort_time - tariff_time)
+
+    def _is_empty_row(self, row):
+        return all(cell in (None, "", 0) for cell in row)
+
+    def _emit_sheet_progress(self, rows_read, total_rows):
+        if not total_rows:
+            return
+        start, span = self._sheet_progress
+        fraction = min(rows_read / total_rows, 1.0)
+        self.progressUpdated.emit(int(start + span * fraction))
+        self._emit_metrics()
 
-    def _normalize(self, text):
-        return ''.join(c for c in unicodedata.normalize('NFD', str(text).lower()) 
-                      if not unicodedata.combining(c))
+    def _get_output_path(self):
+        base, _ = os.path.splitext(self.file_path)
+        return f"{base}_leitura_agitel{SAIDAS[self.output_format].extensao}"
 
     def stop(self):
         self._interrupted = True
\ No newline at end of file
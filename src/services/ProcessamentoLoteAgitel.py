@@ -0,0 +1,223 @@
+import os
+import gc
+import queue
+import heapq
+import shutil
+import logging
+import tempfile
+import multiprocessing
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PyQt6.QtCore import pyqtSignal
+from services.ProcessamentoAgitel import ProcessadorAgitel, _chave_regiao, _chave_duplicata
+from utils.callStore import BaseChamadas
+from utils.dedupIndex import IndiceDuplicatas
+from utils.externalSort import ler_linhas
+from utils.outputSinks import SAIDAS
+
+
+def listar_planilhas_agitel(pasta):
+    """Planilhas .xlsx da pasta em ordem de nome, sem as saídas já geradas nem os temporários do Excel."""
+    return sorted(
+        os.path.join(pasta, nome) for nome in os.listdir(pasta)
+        if nome.lower().endswith(".xlsx") and not nome.startswith("~$") and "_leitura_agitel" not in nome
+    )
+
+
+def _processar_arquivo_worker(file_path, opcoes, tagged_run_path, fila, parar):
+    """
+    Processa um arquivo inteiro dentro de um processo do pool. Progresso e
+    log são enviados para `fila` como (arquivo, tipo, valor). O evento
+    `parar` é conferido a cada bloco de linhas e interrompe o processamento.
+    Retorna a mensagem de conclusão ou levanta RuntimeError com a mensagem
+    de erro.
+    """
+    nome = os.path.basename(file_path)
+    if parar.is_set():
+        return ""
+    processador = ProcessadorAgitel(file_path, tagged_run_path=tagged_run_path, **opcoes)
+    erros, concluido = [], []
+
+    def progresso(valor):
+        fila.put((nome, 'progresso', valor))
+        if parar.is_set():
+            processador.stop()
+
+    processador.progressUpdated.connect(progresso)
+    processador.logUpdated.connect(lambda mensagem: fila.put((nome, 'log', mensagem)))
+    processador.errorOccurred.connect(erros.append)
+    processador.processFinished.connect(concluido.append)
+    processador.run()
+
+    if erros:
+        raise RuntimeError(erros[0])
+    return concluido[0] if concluido else ""
+
+
+class ProcessadorLoteAgitel(ProcessadorAgitel):
+    """
+    Modo pasta: processa cada planilha da pasta como o ProcessadorAgitel,
+    um arquivo por processo do pool, gerando as saídas individuais de sempre.
+    Com `combine`, cada processo também grava suas linhas ordenadas num run
+    com o nome do arquivo de origem, e os runs são intercalados (k-way merge)
+    numa saída combinada com a coluna extra 'Arquivo'. Com `deduplicate`,
+    cada arquivo remove as próprias duplicatas e a saída combinada remove as
+    repetidas entre arquivos (só ela usa o índice persistente de dedup_path,
+    e os arquivos reprocessados não contam como duplicatas de si mesmos).
+    Com `store_path`, os runs de cada arquivo são carregados, no processo
+    principal, na base de consultas.
+    """
+    fileProgress = pyqtSignal(str, int)
+
+    COLUNAS_SAIDA = ProcessadorAgitel.COLUNAS_SAIDA + ['Arquivo']
+    TIPOS_SAIDA = ProcessadorAgitel.TIPOS_SAIDA + ['texto']
+
+    def __init__(self, folder_path, equalize, workers=1, combine=False, **kwargs):
+        super().__init__(folder_path, equalize, workers=workers, **kwargs)
+        self.combine = combine
+        self._run_dir = None
+
+    def _file_options(self):
+        """
+        Opções repassadas ao ProcessadorAgitel de cada arquivo (sempre com um
+        processo); o limite de memória é dividido entre os processos do pool.
+        """
+        budget = self.memory_budget_mb // max(self.workers, 1) if self.memory_budget_mb else None
+        return {
+            'equalize': self.equalize,
+            'sort_run_size': self.sort_run_size,
+            'chunk_size': self.chunk_size,
+            'reader_backend': self.reader_backend,
+            'conversion_mode': self.conversion_mode,
+            'use_cache': self.use_cache,
+            'cache_dir': self.cache_dir,
+            'output_format': self.output_format,
+            'summary': self.summary,
+            'memory_budget_mb': budget,
+            'spill_backend': self.spill_backend,
+            'deduplicate': self.deduplicate,
+            'tariff_path': self.tariff_path,
+            'checkpoint': self.checkpoint,
+        }
+
+    def run(self):
+        try:
+            files = listar_planilhas_agitel(self.file_path)
+            if not files:
+                self.errorOccurred.emit("Nenhuma planilha .xlsx encontrada na pasta")
+                return
+            self._load_tariffs()
+
+            if self.combine or self.store_path:
+                self._run_dir = tempfile.mkdtemp(prefix="agitel_lote_")
+            processed = self._process_files(files)
+            runs = [run for run in processed.values() if run]
+
+            message = f"{len(processed)} de {len(files)} arquivos processados"
+            if self.store_path and runs and not self._interrupted:
+                self._store_runs(processed)
+            if self.combine and runs and not self._interrupted:
+                output_path = self._get_output_path()
+                self.logUpdated.emit(f"Gerando saída combinada de {len(runs)} arquivos...")
+                rows = heapq.merge(*(ler_linhas(caminho) for caminho in runs), key=_chave_regiao)
+                if self.deduplicate:
+                    self._dedup = IndiceDuplicatas(_chave_duplicata, self.dedup_path, origem=itemgetter(-1),
+                                                   origens_reprocessadas=[os.path.basename(path) for path in processed])
+                    rows = self._dedup.filtrar(rows)
+                self._write_output(rows, output_path)
+                self._finish_dedup()
+                self._finish_tariff()
+                message += f". Saída combinada salva em: {output_path}"
+            self.processFinished.emit(message)
+
+        except Exception as e:
+            self.errorOccurred.emit(f"Erro crítico: {str(e)}")
+            logging.exception("Erro durante o processamento em lote")
+        finally:
+            if self._store:
+                self._store.fechar()
+            if self._run_dir:
+                shutil.rmtree(self._run_dir, ignore_errors=True)
+                self._run_dir = None
+            gc.collect()
+
+    def _process_files(self, files):
+        """
+        Processa os arquivos no pool; retorna {arquivo: run ou None} dos que
+        terminaram bem, na ordem dos arquivos.
+        """
+        total = len(files)
+        self.logUpdated.emit(f"{total} arquivos na fila, {min(self.workers, total)} processos")
+
+        runs = {}
+        if self._run_dir:
+            runs = {path: os.path.join(self._run_dir, f"{index}.run") for index, path in enumerate(files)}
+
+        manager = multiprocessing.Manager()
+        fila = manager.Queue()
+        parar = manager.Event()
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, total))
+        futures = {
+            executor.submit(_processar_arquivo_worker, path, self._file_options(), runs.get(path), fila, parar): path
+            for path in files
+        }
+        pending = set(futures)
+        succeeded = set()
+
+        try:
+            while pending and not self._interrupted:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                self._drain_queue(fila)
+                for future in done:
+                    path = futures[future]
+                    name = os.path.basename(path)
+                    try:
+                        self.logUpdated.emit(f"✔ {name}: {future.result()}")
+                        self.fileProgress.emit(name, 100)
+                        succeeded.add(path)
+                    except Exception as e:
+                        self.logUpdated.emit(f"Erro em {name}: {e}")
+                if done:
+                    self.progressUpdated.emit(int((total - len(pending)) * 100 / total))
+            self._drain_queue(fila)
+        finally:
+            # Os arquivos em andamento param no próximo bloco, em vez de serem processados até o fim
+            if self._interrupted:
+                parar.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            manager.shutdown()
+
+        return {path: runs.get(path) for path in files if path in succeeded}
+
+    def _store_runs(self, processed):
+        """Substitui na base de consultas as linhas de cada arquivo processado pelas do seu run."""
+        self.logUpdated.emit(f"Gravando {len(processed)} arquivos na base de consultas...")
+        self._store = BaseChamadas(self.store_path)
+        try:
+            for path, run in processed.items():
+                self._store.remover_arquivo(path)
+                # O run traz só o nome do arquivo na última coluna; a base guarda o caminho completo
+                self._store.adicionar((row[:-1] for row in ler_linhas(run)), path)
+            self._finish_store()
+        finally:
+            # A base já tem as linhas de todos os arquivos; a saída combinada não deve gravá-las de novo
+            self._store.fechar()
+            self._store = None
+
+    def _drain_queue(self, fila):
+        while True:
+            try:
+                name, kind, value = fila.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'progresso':
+                self.fileProgress.emit(name, value)
+            else:
+                self.logUpdated.emit(f"[{name}] {value}")
+
+    def _output_formats(self):
+        return super()._output_formats() + [None]
+
+    def _get_output_path(self):
+        folder = os.path.normpath(self.file_path)
+        return os.path.join(folder, f"{os.path.basename(folder)}_leitura_agitel{SAIDAS[self.output_format].extensao}")
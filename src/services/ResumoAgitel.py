@@ -0,0 +1,59 @@
+from openpyxl.utils.datetime import from_excel
+from utils.dateParser import como_serial
+
+
+class ResumoAgitel:
+    """
+    Agregados acumulados enquanto as linhas de saída passam pelo gravador.
+
+    Para cada Origem, Serviço, Região e dia guarda, em dicionários, a
+    quantidade de chamadas, os minutos e o valor somados e os maiores
+    minutos e valor de uma chamada. Espera as linhas no formato de
+    COLUNAS_SAIDA do ProcessadorAgitel.
+    """
+
+    AGRUPAMENTOS = ('Origem', 'Serviço', 'Região', 'Dia')
+    COLUNAS = [
+        'Agrupamento', 'Chave', 'Chamadas', 'Minutos', 'Valor',
+        'Maior duração (minutos)', 'Maior valor'
+    ]
+    TIPOS = ['texto', 'texto', 'numero', 'numero', 'numero', 'numero', 'numero']
+
+    def __init__(self):
+        self._grupos = {nome: {} for nome in self.AGRUPAMENTOS}
+
+    def adicionar(self, linhas):
+        origens, servicos, regioes, dias = (self._grupos[nome] for nome in self.AGRUPAMENTOS)
+
+        for row in linhas:
+            data, minutos, valor = row[0], row[6], row[7]
+            if isinstance(data, (int, float)):
+                dia = int(data)
+            else:
+                # Datas em texto (dd/mm/aaaa ...) entram no mesmo dia que as seriais
+                serial = como_serial(data) if isinstance(data, str) else None
+                dia = int(serial) if serial is not None else str(data or "")
+
+            for grupo, chave in ((origens, row[1]), (servicos, row[2]), (regioes, row[3] or ""), (dias, dia)):
+                acumulado = grupo.get(chave)
+                if acumulado is None:
+                    grupo[chave] = [1, minutos, valor, minutos, valor]
+                    continue
+                acumulado[0] += 1
+                acumulado[1] += minutos
+                acumulado[2] += valor
+                if minutos > acumulado[3]:
+                    acumulado[3] = minutos
+                if valor > acumulado[4]:
+                    acumulado[4] = valor
+
+    def linhas(self):
+        """Gera as linhas do resumo, agrupamento por agrupamento, em ordem de chave."""
+        for nome in self.AGRUPAMENTOS:
+            # Dias vêm como serial do Excel; textos não reconhecidos ficam no fim
+            for chave, (chamadas, minutos, valor, maior_minutos, maior_valor) in sorted(
+                self._grupos[nome].items(), key=lambda item: (isinstance(item[0], str), item[0])
+            ):
+                if nome == 'Dia' and isinstance(chave, int):
+                    chave = from_excel(chave).strftime("%d/%m/%Y")
+                yield [nome, chave, chamadas, round(minutos, 1), round(valor, 2), maior_minutos, maior_valor]
@@ -0,0 +1,167 @@
+import os
+import csv
+import math
+from openpyxl import load_workbook
+from utils.currencyParser import ConversorMoeda
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CURINGA = "*"
+COLUNAS_TARIFAS = {
+    'regiao': ['região', 'regiao'],
+    'servico': ['serviço', 'servico'],
+    'preco': ['preço por minuto', 'preco por minuto', 'preço', 'preco'],
+    'minimo': ['tempo mínimo', 'tempo minimo', 'mínimo', 'minimo'],
+    'incremento': ['incremento'],
+}
+INCREMENTOS = {'minuto': 60, '6s': 6, '6 segundos': 6, 'segundo': 1}
+# Meio centavo arredonda para cima; a folga absorve o erro de ponto flutuante do produto
+FOLGA_ARREDONDAMENTO = 0.5 + 1e-6
+
+
+def _normalizar(valor):
+    return str(valor).strip().lower() if valor not in (None, "") else CURINGA
+
+
+def _ler_tabela(caminho):
+    if caminho.lower().endswith(".csv"):
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            return list(csv.reader(arquivo, delimiter=";"))
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        return [list(row) for row in wb.active.iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+
+def carregar_tarifas(caminho):
+    """
+    Lê a tabela de tarifas (xlsx ou csv com ';') com as colunas Região,
+    Serviço, Preço por minuto, Tempo mínimo (segundos) e Incremento
+    (segundos, ou 'minuto'/'6s'). Região ou Serviço vazios ou '*' valem
+    para qualquer valor. Retorna {(região, serviço): (preço, mínimo, incremento)}.
+    """
+    linhas = [linha for linha in _ler_tabela(caminho) if any(valor not in (None, "") for valor in linha)]
+    if not linhas:
+        raise ValueError(f"Tabela de tarifas vazia: {os.path.basename(caminho)}")
+
+    cabecalho = [str(valor or "").strip().lower() for valor in linhas[0]]
+    indices = {}
+    for campo, nomes in COLUNAS_TARIFAS.items():
+        indice = next((cabecalho.index(nome) for nome in nomes if nome in cabecalho), None)
+        if indice is not None:
+            indices[campo] = indice
+    faltando = [campo for campo in ('regiao', 'servico', 'preco') if campo not in indices]
+    if faltando:
+        raise ValueError(f"Tabela de tarifas sem as colunas: {', '.join(faltando)}")
+
+    conversor = ConversorMoeda()
+
+    def celula(linha, campo):
+        indice = indices.get(campo)
+        return linha[indice] if indice is not None and indice < len(linha) else None
+
+    tarifas = {}
+    for numero, linha in enumerate(linhas[1:], start=2):
+        incremento = celula(linha, 'incremento')
+        if isinstance(incremento, str) and incremento.strip().lower() in INCREMENTOS:
+            incremento = INCREMENTOS[incremento.strip().lower()]
+        else:
+            incremento = conversor.converter(incremento) or 60
+        minimo = conversor.converter(celula(linha, 'minimo'))
+        if incremento <= 0 or minimo < 0:
+            raise ValueError(f"Tabela de tarifas, linha {numero}: incremento ou tempo mínimo inválido")
+        chave = (_normalizar(celula(linha, 'regiao')), _normalizar(celula(linha, 'servico')))
+        tarifas[chave] = (conversor.converter(celula(linha, 'preco')), minimo, incremento)
+    return tarifas
+
+
+class TarifadorAgitel:
+    """
+    Recalcula o valor esperado de cada chamada pela tabela de tarifas e o
+    compara com o Valor cobrado.
+
+    O tempo cobrado é a duração arredondada para cima no incremento da
+    tarifa (60s por minuto, 6s...), nunca abaixo do tempo mínimo; chamadas
+    de duração zero não são cobradas e o valor é arredondado ao centavo
+    (meio centavo para cima). Com NumPy o cálculo é feito por bloco
+    em arrays; sem ele, linha a linha. Espera as linhas no formato de
+    COLUNAS_SAIDA do ProcessadorAgitel e acrescenta COLUNAS ao fim.
+    """
+
+    COLUNAS = ['Valor esperado', 'Diferença', 'Conferência']
+    TIPOS = ['numero', 'numero', 'texto']
+
+    def __init__(self, tarifas, tolerancia=0.005):
+        self.tolerancia = tolerancia
+        self._tarifas = list(tarifas.values())
+        self._chaves = {chave: indice for indice, chave in enumerate(tarifas)}
+        self._indices = {}
+        self.divergentes = 0
+        self.sem_tarifa = 0
+        self.diferenca_total = 0.0
+        if np is not None:
+            colunas = np.array(self._tarifas, dtype=float).reshape(-1, 3)
+            self._precos, self._minimos, self._incrementos = colunas.T
+
+    def _indice(self, regiao, servico):
+        """Tarifa da região/serviço (exata, depois com curingas); -1 se não houver."""
+        chave = (regiao, servico)
+        indice = self._indices.get(chave)
+        if indice is None:
+            regiao, servico = _normalizar(regiao), _normalizar(servico)
+            indice = next((
+                self._chaves[candidata] for candidata in
+                ((regiao, servico), (CURINGA, servico), (regiao, CURINGA), (CURINGA, CURINGA))
+                if candidata in self._chaves
+            ), -1)
+            self._indices[chave] = indice
+        return indice
+
+    def calcular(self, linhas):
+        """Valores esperados das linhas (None quando não há tarifa ou duração)."""
+        indices = [self._indice(row[3], row[2]) for row in linhas]
+        duracoes = [row[5] if isinstance(row[5], (int, float)) and not isinstance(row[5], bool) else None
+                    for row in linhas]
+        if np is None or not self._tarifas:
+            return [self._calcular_linha(indice, duracao) for indice, duracao in zip(indices, duracoes)]
+
+        indices = np.array(indices, dtype=np.int64)
+        segundos = np.rint(np.array(duracoes, dtype=float) * 86400)
+        validos = (indices >= 0) & ~np.isnan(segundos)
+        posicoes = np.where(validos, indices, 0)
+        incrementos = self._incrementos[posicoes]
+        cobrados = np.maximum(np.ceil(segundos / incrementos) * incrementos, self._minimos[posicoes])
+        cobrados[segundos <= 0] = 0
+        valores = np.floor(cobrados * self._precos[posicoes] * 100 / 60 + FOLGA_ARREDONDAMENTO) / 100
+        return [valor if valido else None for valor, valido in zip(valores.tolist(), validos.tolist())]
+
+    def _calcular_linha(self, indice, duracao):
+        if indice < 0 or duracao is None:
+            return None
+        preco, minimo, incremento = self._tarifas[indice]
+        segundos = round(duracao * 86400)
+        if segundos <= 0:
+            return 0.0
+        cobrado = max(math.ceil(segundos / incremento) * incremento, minimo)
+        return math.floor(cobrado * preco * 100 / 60 + FOLGA_ARREDONDAMENTO) / 100
+
+    def aplicar(self, linhas):
+        """Linhas com o valor esperado, a diferença (cobrado - esperado) e a conferência acrescentados."""
+        resultado = []
+        for row, esperado in zip(linhas, self.calcular(linhas)):
+            if esperado is None:
+                self.sem_tarifa += 1
+                resultado.append(list(row) + [None, None, "Sem tarifa"])
+                continue
+            diferenca = round(row[7] - esperado, 2) if isinstance(row[7], (int, float)) else None
+            if diferenca is not None and abs(diferenca) <= self.tolerancia:
+                resultado.append(list(row) + [esperado, diferenca, "OK"])
+                continue
+            self.divergentes += 1
+            self.diferenca_total += diferenca or 0.0
+            resultado.append(list(row) + [esperado, diferenca, "Divergente"])
+        return resultado
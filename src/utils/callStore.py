@@ -0,0 +1,181 @@
+import os
+import sqlite3
+from itertools import islice
+from datetime import date, datetime, timedelta
+from openpyxl.utils.datetime import to_excel
+from utils.dateParser import como_serial
+
+COLUNAS = [
+    'Data', 'Origem', 'Serviço', 'Região', 'Destino',
+    'Duração', 'Duração (minutos)', 'Valor', 'Arquivo'
+]
+TIPOS = ['data', 'texto', 'texto', 'texto', 'texto', 'duracao', 'numero', 'numero', 'texto']
+FORMATOS = ['YYYY-MM-DD HH:MM:SS', None, None, None, None, 'hh:mm:ss', '0.0', 'R$ #,##0.00', None]
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS chamadas (
+    data, origem TEXT, servico TEXT, regiao TEXT, destino TEXT,
+    duracao REAL, minutos REAL, valor REAL, arquivo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_chamadas_data ON chamadas (data);
+CREATE INDEX IF NOT EXISTS idx_chamadas_origem ON chamadas (origem, data);
+CREATE INDEX IF NOT EXISTS idx_chamadas_destino ON chamadas (destino, data);
+CREATE INDEX IF NOT EXISTS idx_chamadas_arquivo ON chamadas (arquivo);
+"""
+_INSERIR = "INSERT INTO chamadas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _serial(valor, fim_do_dia=False):
+    """Data/datetime como serial do Excel (como a coluna Data é gravada); um date no fim inclui o dia todo."""
+    if isinstance(valor, datetime):
+        return to_excel(valor)
+    if isinstance(valor, date):
+        if fim_do_dia:
+            valor += timedelta(days=1)
+        return to_excel(datetime(valor.year, valor.month, valor.day))
+    return valor
+
+
+def _com_data_serial(linha):
+    """Linha com a Data em texto convertida para serial; o texto fica se o formato não for reconhecido."""
+    data = linha[0]
+    if isinstance(data, str):
+        serial = como_serial(data)
+        if serial is not None:
+            linha = [serial, *linha[1:]]
+    return linha
+
+
+class BaseChamadas:
+    """
+    Base SQLite local com as chamadas processadas, indexada por Data, Origem
+    e Destino para consultas e exportações filtradas sem reler a planilha.
+
+    As linhas seguem COLUNAS (as de saída do ProcessadorAgitel mais o
+    caminho completo do arquivo de origem). Reprocessar um arquivo substitui
+    as linhas dele: remover_arquivo() e adicionar() ficam na mesma transação
+    até confirmar(). A Data é sempre gravada como serial do Excel (datas em
+    texto são convertidas), para os filtros de período valerem para todas.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conexao = sqlite3.connect(caminho)
+        self._conexao.execute("PRAGMA journal_mode = WAL")
+        self._conexao.execute("PRAGMA synchronous = NORMAL")
+        self._conexao.executescript(_ESQUEMA)
+        self._converter_datas_texto()
+
+    def _converter_datas_texto(self):
+        """Converte para serial as datas em texto gravadas por versões anteriores."""
+        # No SQLite, textos vêm depois dos números: a faixa usa o índice de data e só pega textos
+        textos = self._conexao.execute("SELECT rowid, data FROM chamadas WHERE data >= ''").fetchall()
+        convertidas = [(serial, rowid) for rowid, serial in
+                       ((rowid, como_serial(data)) for rowid, data in textos) if serial is not None]
+        if convertidas:
+            self._conexao.executemany("UPDATE chamadas SET data = ? WHERE rowid = ?", convertidas)
+            self._conexao.commit()
+
+    def remover_arquivo(self, caminho):
+        """
+        Remove as linhas do arquivo (pelo caminho completo). As linhas de
+        versões anteriores, gravadas só com o nome do arquivo, também saem.
+        """
+        return self._conexao.execute(
+            "DELETE FROM chamadas WHERE arquivo IN (?, ?)",
+            (os.path.abspath(caminho), os.path.basename(caminho))
+        ).rowcount
+
+    def adicionar(self, linhas, arquivo=None):
+        """Insere linhas já com a coluna Arquivo ou, com `arquivo` (caminho), acrescenta-o a cada linha."""
+        if arquivo is not None:
+            arquivo = os.path.abspath(arquivo)
+            linhas = (list(linha) + [arquivo] for linha in linhas)
+        cursor = self._conexao.executemany(_INSERIR, map(_com_data_serial, linhas))
+        return cursor.rowcount
+
+    def confirmar(self):
+        self._conexao.commit()
+
+    def _filtro(self, origem=None, destino=None, inicio=None, fim=None, arquivo=None):
+        """
+        Cláusula WHERE e parâmetros. `origem` aceita um valor ou uma lista;
+        `destino` é um prefixo (ex.: '11' pega todos os números que começam
+        com 11); `inicio` e `fim` são date/datetime, com `fim` inclusivo.
+        """
+        condicoes, parametros = [], []
+        if origem:
+            origens = [origem] if isinstance(origem, str) else list(origem)
+            condicoes.append(f"origem IN ({', '.join('?' * len(origens))})")
+            parametros.extend(origens)
+        if destino:
+            # Faixa em vez de LIKE, para o índice de destino ser usado
+            condicoes.append("destino >= ? AND destino < ?")
+            parametros.extend([destino, destino + "\uffff"])
+        if inicio is not None:
+            condicoes.append("data >= ?")
+            parametros.append(_serial(inicio))
+        if fim is not None:
+            dia_inteiro = isinstance(fim, date) and not isinstance(fim, datetime)
+            condicoes.append("data < ?" if dia_inteiro else "data <= ?")
+            parametros.append(_serial(fim, fim_do_dia=True))
+        if arquivo:
+            condicoes.append("arquivo = ?")
+            parametros.append(arquivo)
+        return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+    def consultar(self, limite=None, tamanho_lote=5000, **filtros):
+        """Gera as linhas (no formato de COLUNAS) que atendem aos filtros, em ordem de data."""
+        where, parametros = self._filtro(**filtros)
+        sql = f"SELECT * FROM chamadas{where} ORDER BY data"
+        if limite:
+            sql += f" LIMIT {int(limite)}"
+        cursor = self._conexao.execute(sql, parametros)
+        while True:
+            lote = cursor.fetchmany(tamanho_lote)
+            if not lote:
+                return
+            yield from lote
+
+    def contar(self, **filtros):
+        where, parametros = self._filtro(**filtros)
+        return self._conexao.execute(f"SELECT COUNT(*) FROM chamadas{where}", parametros).fetchone()[0]
+
+    def totais(self, **filtros):
+        """(chamadas, minutos, valor) das linhas que atendem aos filtros."""
+        where, parametros = self._filtro(**filtros)
+        chamadas, minutos, valor = self._conexao.execute(
+            f"SELECT COUNT(*), TOTAL(minutos), TOTAL(valor) FROM chamadas{where}", parametros
+        ).fetchone()
+        return chamadas, minutos, valor
+
+    def origens(self):
+        return [linha[0] for linha in self._conexao.execute(
+            "SELECT DISTINCT origem FROM chamadas WHERE origem IS NOT NULL ORDER BY origem"
+        )]
+
+    def arquivos(self):
+        return [linha[0] for linha in self._conexao.execute("SELECT DISTINCT arquivo FROM chamadas ORDER BY arquivo")]
+
+    def exportar(self, saida, tamanho_lote=5000, **filtros):
+        """Grava no destino `saida` (um SaidaArquivo com COLUNAS) as linhas filtradas; retorna quantas."""
+        linhas = self.consultar(tamanho_lote=tamanho_lote, **filtros)
+        while True:
+            lote = list(islice(linhas, tamanho_lote))
+            if not lote:
+                return saida.total_linhas
+            saida.escrever(lote)
+
+    def fechar(self):
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.confirmar()
+        else:
+            self._conexao.rollback()
+        self.fechar()
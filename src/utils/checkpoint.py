@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+MANIFESTO = "manifesto.json"
+
+
+class PontoControle:
+    """
+    Checkpoint de um processamento: as linhas convertidas de cada aba
+    concluída (no formato de gravar_linhas) e um manifesto que as lista.
+
+    A pasta é própria de cada arquivo de entrada. O manifesto guarda o
+    tamanho e a data de modificação do arquivo e a `variante` das opções de
+    conversão; se algum deles mudou, o checkpoint antigo é descartado. O
+    manifesto é regravado (de forma atômica) a cada aba concluída, então
+    um processamento cancelado ou interrompido por falha pode ser retomado
+    a partir da última aba registrada.
+    """
+
+    def __init__(self, caminho_xlsx, variante="", pasta_base=None):
+        self.caminho_xlsx = os.path.abspath(caminho_xlsx)
+        pasta_base = pasta_base or os.path.join(tempfile.gettempdir(), "agitel_checkpoints")
+        nome = hashlib.blake2b(self.caminho_xlsx.encode("utf-8"), digest_size=10).hexdigest()
+        self.pasta = os.path.join(pasta_base, nome)
+        info = os.stat(self.caminho_xlsx)
+        self._identidade = {
+            'arquivo': self.caminho_xlsx,
+            'tamanho': info.st_size,
+            'modificado': info.st_mtime_ns,
+            'variante': variante,
+        }
+        self._abas = {}
+        self._proximo = 0
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(os.path.join(self.pasta, MANIFESTO), encoding="utf-8") as arquivo:
+                manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            manifesto = None
+
+        if manifesto and all(manifesto.get(campo) == valor for campo, valor in self._identidade.items()):
+            self._abas = {
+                titulo: nome for titulo, nome in manifesto.get('abas', {}).items()
+                if os.path.exists(os.path.join(self.pasta, nome))
+            }
+            # Contador só cresce: uma aba nova nunca reusa o nome de um arquivo de outra
+            self._proximo = manifesto.get('proximo', len(manifesto.get('abas', {})))
+        else:
+            self.descartar()
+        os.makedirs(self.pasta, exist_ok=True)
+
+    def abas_concluidas(self):
+        """{título: caminho das linhas convertidas} das abas já registradas."""
+        return {titulo: os.path.join(self.pasta, nome) for titulo, nome in self._abas.items()}
+
+    def novo_temporario(self):
+        """Cria um arquivo temporário na pasta do checkpoint; retorna (fd, caminho)."""
+        return tempfile.mkstemp(prefix="aba_", suffix=".tmp", dir=self.pasta)
+
+    def registrar(self, titulo, caminho_temp):
+        """Move as linhas de uma aba concluída para o checkpoint e atualiza o manifesto."""
+        nome = f"aba_{self._proximo}.linhas"
+        while os.path.exists(os.path.join(self.pasta, nome)):
+            self._proximo += 1
+            nome = f"aba_{self._proximo}.linhas"
+        self._proximo += 1
+        shutil.move(caminho_temp, os.path.join(self.pasta, nome))
+        self._abas[titulo] = nome
+
+        temporario = os.path.join(self.pasta, f"{MANIFESTO}.tmp")
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({**self._identidade, 'abas': self._abas, 'proximo': self._proximo}, arquivo, ensure_ascii=False)
+        os.replace(temporario, os.path.join(self.pasta, MANIFESTO))
+
+    def descartar(self):
+        """Remove o checkpoint (ao concluir o processamento ou quando ele não vale mais)."""
+        shutil.rmtree(self.pasta, ignore_errors=True)
+        self._abas = {}
+        self._proximo = 0
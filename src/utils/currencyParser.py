@@ -0,0 +1,55 @@
+import re
+from functools import lru_cache
+
+RE_NUMERO = re.compile(r"\d+(\.\d+)?")
+RE_MILHAR = re.compile(r"[1-9]\d{0,2}\.\d{3}")
+
+
+class ConversorMoeda:
+    """
+    Converte valores monetários no formato brasileiro ("R$ 1.234,56") em float.
+
+    Aceita separador de milhar, sinal negativo antes ou depois do número e
+    valores entre parênteses; números já numéricos passam direto. Os textos
+    distintos já vistos ficam num cache LRU limitado, já que os registros de
+    chamadas repetem poucas tarifas muitas vezes. Valores inválidos viram 0.0.
+    """
+
+    def __init__(self, tamanho_cache=4096):
+        self._converter_texto = lru_cache(maxsize=tamanho_cache)(self._interpretar)
+
+    def converter(self, valor):
+        if valor is None:
+            return 0.0
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return float(valor)
+        return self._converter_texto(str(valor))
+
+    def estatisticas(self):
+        """Retorna (acertos, falhas) do cache."""
+        info = self._converter_texto.cache_info()
+        return info.hits, info.misses
+
+    @staticmethod
+    def _interpretar(texto):
+        texto = texto.replace("R$", "").replace("\xa0", "").replace(" ", "").strip()
+
+        negativo = False
+        if texto.startswith("(") and texto.endswith(")"):
+            negativo, texto = True, texto[1:-1]
+        if texto.startswith("-"):
+            negativo, texto = not negativo, texto[1:]
+        elif texto.endswith("-"):
+            negativo, texto = not negativo, texto[:-1]
+
+        if "," in texto:
+            texto = texto.replace(".", "").replace(",", ".")
+        elif texto.count(".") > 1 or RE_MILHAR.fullmatch(texto):
+            # Sem vírgula, "1.234" e "1.234.567" são separadores de milhar;
+            # "0.12" ou "12.5" continuam sendo ponto decimal
+            texto = texto.replace(".", "")
+
+        if not RE_NUMERO.fullmatch(texto):
+            return 0.0
+        valor = float(texto)
+        return -valor if negativo else valor
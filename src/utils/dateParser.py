@@ -0,0 +1,35 @@
+from datetime import datetime
+from openpyxl.utils.datetime import from_excel, to_excel
+
+# Formatos de data em texto das exportações da Agitel
+FORMATOS_DATA_TEXTO = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+
+def interpretar_data_texto(texto):
+    """datetime de uma data em texto (dd/mm/aaaa, com hora opcional); None se o formato não for reconhecido."""
+    texto = texto.strip()
+    for formato in FORMATOS_DATA_TEXTO:
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    return None
+
+
+def como_datetime(valor):
+    """Data como datetime: serial do Excel, datetime ou texto reconhecido; None nos demais casos."""
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return from_excel(valor)
+    if isinstance(valor, str):
+        return interpretar_data_texto(valor)
+    return None
+
+
+def como_serial(valor):
+    """Data como serial do Excel (float); None se não for uma data reconhecida."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    data = como_datetime(valor)
+    return to_excel(data) if data is not None else None
@@ -0,0 +1,149 @@
+import os
+import hashlib
+from array import array
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TAMANHO_LOTE = 5000
+
+
+def hash_registro(valores):
+    """Hash estável de 64 bits de uma tupla de valores (o mesmo em qualquer processo ou execução)."""
+    return int.from_bytes(hashlib.blake2b(repr(valores).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _id_origem(nome):
+    """Identificador de 64 bits de um arquivo de origem; 0 fica para origem desconhecida."""
+    return hash_registro((nome,)) or 1
+
+
+class IndiceDuplicatas:
+    """
+    Conjunto de hashes de 64 bits dos registros já vistos.
+
+    Com NumPy, os hashes ficam num array ordenado (8 bytes por registro) e
+    só os mais recentes num dict, incorporado ao array quando cresce demais;
+    sem NumPy, tudo fica no dict. Com `caminho`, o índice é carregado do
+    arquivo e salvar() o grava de volta, para lembrar registros entre execuções.
+
+    `origem(linha)` dá o nome do arquivo de onde a linha veio, gravado junto
+    com o hash (em `caminho`.origens). Ao carregar, os registros das
+    `origens_reprocessadas` são descartados: processar de novo o mesmo
+    arquivo não remove as próprias chamadas, só as que já vieram de outros.
+    """
+
+    def __init__(self, chave, caminho=None, limite_recentes=200_000, origem=None, origens_reprocessadas=()):
+        self.chave = chave
+        self.caminho = caminho
+        self.limite_recentes = limite_recentes
+        self.origem = origem
+        self.removidas = 0
+        self.mantidas = 0
+        self._recentes = {}
+        self._ordenados = np.empty(0, dtype=np.uint64) if np is not None else None
+        self._origens = np.empty(0, dtype=np.uint64) if np is not None else None
+        if caminho and os.path.exists(caminho):
+            self._carregar({_id_origem(nome) for nome in origens_reprocessadas})
+
+    def __len__(self):
+        return len(self._recentes) + (len(self._ordenados) if self._ordenados is not None else 0)
+
+    @property
+    def caminho_origens(self):
+        return f"{self.caminho}.origens"
+
+    def filtrar(self, linhas):
+        """Gera só as linhas cuja chave ainda não foi vista, registrando-as."""
+        linhas = iter(linhas)
+        while True:
+            lote = list(islice(linhas, TAMANHO_LOTE))
+            if not lote:
+                return
+            yield from self._filtrar_lote(lote)
+
+    def _filtrar_lote(self, lote):
+        chave = self.chave
+        origem = self.origem
+        hashes = [hash_registro(chave(linha)) for linha in lote]
+        antigos = self._contidos_no_array(hashes)
+        recentes = self._recentes
+
+        novas = []
+        for linha, valor, antigo in zip(lote, hashes, antigos):
+            if antigo or valor in recentes:
+                self.removidas += 1
+                continue
+            recentes[valor] = _id_origem(origem(linha)) if origem is not None else 0
+            novas.append(linha)
+        self.mantidas += len(novas)
+
+        if self._ordenados is not None and len(recentes) > max(self.limite_recentes, len(self._ordenados) // 2):
+            self._incorporar_recentes()
+        return novas
+
+    def _contidos_no_array(self, hashes):
+        if self._ordenados is None or not len(self._ordenados):
+            return [False] * len(hashes)
+        valores = np.array(hashes, dtype=np.uint64)
+        posicoes = np.searchsorted(self._ordenados, valores)
+        posicoes[posicoes == len(self._ordenados)] = 0
+        return (self._ordenados[posicoes] == valores).tolist()
+
+    def _incorporar_recentes(self):
+        hashes = np.fromiter(self._recentes.keys(), dtype=np.uint64, count=len(self._recentes))
+        origens = np.fromiter(self._recentes.values(), dtype=np.uint64, count=len(self._recentes))
+        self._definir_array(np.concatenate([self._ordenados, hashes]), np.concatenate([self._origens, origens]))
+        self._recentes = {}
+
+    def _definir_array(self, hashes, origens):
+        # np.unique devolve a primeira ocorrência de cada hash: a origem mais antiga fica
+        self._ordenados, posicoes = np.unique(hashes, return_index=True)
+        self._origens = origens[posicoes]
+
+    def _carregar(self, descartar):
+        hashes = self._ler_valores(self.caminho)
+        origens = self._ler_valores(self.caminho_origens) if os.path.exists(self.caminho_origens) else []
+        if len(origens) != len(hashes):
+            # Índice de uma versão sem origens (ou gravado pela metade): origem desconhecida
+            origens = np.zeros(len(hashes), dtype=np.uint64) if np is not None else [0] * len(hashes)
+
+        if self._ordenados is not None:
+            manter = ~np.isin(origens, np.array(sorted(descartar), dtype=np.uint64))
+            self._definir_array(hashes[manter], origens[manter])
+        else:
+            self._recentes = {valor: origem for valor, origem in zip(hashes, origens) if origem not in descartar}
+
+    def _ler_valores(self, caminho):
+        if np is not None:
+            return np.fromfile(caminho, dtype="<u8").astype(np.uint64)
+        valores = array("Q")
+        with open(caminho, "rb") as arquivo:
+            valores.frombytes(arquivo.read())
+        return valores
+
+    def _gravar_valores(self, caminho, valores):
+        temporario = f"{caminho}.tmp"
+        if np is not None:
+            valores.astype("<u8").tofile(temporario)
+        else:
+            with open(temporario, "wb") as arquivo:
+                array("Q", valores).tofile(arquivo)
+        os.replace(temporario, caminho)
+
+    def salvar(self):
+        if not self.caminho:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        if self._ordenados is not None:
+            self._incorporar_recentes()
+            hashes, origens = self._ordenados, self._origens
+        else:
+            itens = sorted(self._recentes.items())
+            hashes, origens = [valor for valor, _ in itens], [origem for _, origem in itens]
+        # Origens primeiro: se só elas forem gravadas, o tamanho não bate com o dos hashes e são ignoradas
+        self._gravar_valores(self.caminho_origens, origens)
+        self._gravar_valores(self.caminho, hashes)
@@ -0,0 +1,254 @@
+import os
+import sys
+import heapq
+import pickle
+import sqlite3
+import tempfile
+
+TAMANHO_BLOCO = 1000
+# Com limite de memória, o tamanho de uma linha a cada AMOSTRAGEM entra na média que estima as demais
+AMOSTRAGEM = 1000
+# Máximo de runs abertos ao mesmo tempo numa intercalação; acima disso ela é feita em mais de uma passada
+MAX_RUNS_INTERCALACAO = 64
+
+
+def tamanho_estimado(linha):
+    """Bytes ocupados por uma linha (a lista e seus valores), segundo sys.getsizeof."""
+    return sys.getsizeof(linha) + sum(sys.getsizeof(valor) for valor in linha)
+
+
+class _LimiteLinhas:
+    """
+    Quantas linhas cabem em `limite_memoria` bytes, pela média do tamanho das
+    linhas amostradas (uma a cada AMOSTRAGEM). O buffer é comparado com esse
+    número a cada linha, então a estimativa nunca supõe mais linhas do que
+    ele realmente tem.
+    """
+
+    def __init__(self, limite_memoria, linhas_por_lote):
+        self.limite_memoria = limite_memoria
+        self.linhas_por_lote = linhas_por_lote
+        self.linhas = linhas_por_lote
+        self._bytes_amostrados = 0
+        self._amostras = 0
+
+    def amostrar(self, linha):
+        self._bytes_amostrados += tamanho_estimado(linha)
+        self._amostras += 1
+        tamanho_medio = self._bytes_amostrados / self._amostras
+        self.linhas = max(1, min(self.linhas_por_lote, int(self.limite_memoria / tamanho_medio)))
+
+
+def gravar_linhas(arquivo, linhas):
+    """Grava linhas em um arquivo binário aberto, em blocos serializados com pickle."""
+    bloco = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= TAMANHO_BLOCO:
+            pickle.dump(bloco, arquivo, pickle.HIGHEST_PROTOCOL)
+            bloco = []
+    if bloco:
+        pickle.dump(bloco, arquivo, pickle.HIGHEST_PROTOCOL)
+
+
+def ler_linhas(caminho):
+    """Lê de volta, bloco a bloco, as linhas gravadas por gravar_linhas."""
+    with open(caminho, "rb") as arquivo:
+        while True:
+            try:
+                bloco = pickle.load(arquivo)
+            except EOFError:
+                return
+            yield from bloco
+
+
+class OrdenadorExterno:
+    """
+    Ordenação externa com memória limitada.
+
+    As linhas são acumuladas em um buffer; quando o buffer atinge
+    `linhas_por_lote` ou, se definido, o tamanho estimado passa de
+    `limite_memoria` bytes, ele é ordenado e gravado em um arquivo temporário
+    (um "run"). Ao final, os runs são intercalados com heapq.merge, que é
+    estável: linhas com a mesma chave mantêm a ordem de chegada. Com mais
+    de `max_runs` runs, grupos de runs consecutivos são antes intercalados
+    em runs maiores, para não abrir um arquivo por run de uma vez.
+    """
+
+    def __init__(self, chave, linhas_por_lote=200_000, pasta_temp=None, limite_memoria=None,
+                 max_runs=MAX_RUNS_INTERCALACAO):
+        self.chave = chave
+        self.linhas_por_lote = linhas_por_lote
+        self.pasta_temp = pasta_temp
+        self.limite_memoria = limite_memoria
+        self.max_runs = max(max_runs, 2)
+        self.total_linhas = 0
+        self._buffer = []
+        self._limite = _LimiteLinhas(limite_memoria, linhas_por_lote) if limite_memoria else None
+        self._runs = []
+
+    @property
+    def total_runs(self):
+        return len(self._runs)
+
+    def adicionar(self, linha):
+        self._buffer.append(linha)
+        self.total_linhas += 1
+        if self._limite is not None and len(self._buffer) % AMOSTRAGEM == 1:
+            self._limite.amostrar(linha)
+        if len(self._buffer) >= (self._limite.linhas if self._limite is not None else self.linhas_por_lote):
+            self._descarregar_buffer()
+
+    def adicionar_varias(self, linhas):
+        for linha in linhas:
+            self.adicionar(linha)
+
+    def ordenados(self):
+        """Gera todas as linhas recebidas, em ordem, sem materializá-las."""
+        self._buffer.sort(key=self.chave)
+        if not self._runs:
+            yield from self._buffer
+            return
+
+        if self._buffer:
+            self._descarregar_buffer()
+        while len(self._runs) > self.max_runs:
+            self._intercalar_passada()
+        yield from heapq.merge(*(ler_linhas(caminho) for caminho in self._runs), key=self.chave)
+
+    def fechar(self):
+        self._buffer = []
+        for caminho in self._runs:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+        self._runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _descarregar_buffer(self):
+        self._buffer.sort(key=self.chave)
+        self._runs.append(self._gravar_run(self._buffer))
+        self._buffer = []
+
+    def _gravar_run(self, linhas):
+        fd, caminho = tempfile.mkstemp(prefix="run_", suffix=".tmp", dir=self.pasta_temp)
+        with os.fdopen(fd, "wb") as arquivo:
+            gravar_linhas(arquivo, linhas)
+        return caminho
+
+    def _intercalar_passada(self):
+        """Intercala grupos de até max_runs runs consecutivos, mantendo a ordem entre os grupos (estável)."""
+        runs = []
+        for inicio in range(0, len(self._runs), self.max_runs):
+            grupo = self._runs[inicio:inicio + self.max_runs]
+            if len(grupo) == 1:
+                runs.extend(grupo)
+                continue
+            runs.append(self._gravar_run(heapq.merge(*(ler_linhas(caminho) for caminho in grupo), key=self.chave)))
+            for caminho in grupo:
+                os.remove(caminho)
+        self._runs = runs
+
+
+class OrdenadorSQLite:
+    """
+    Mesma interface do OrdenadorExterno, mas o excedente vai para um banco
+    SQLite temporário: as linhas são gravadas serializadas junto com a chave
+    e o próprio SQLite ordena em disco (ORDER BY chave, rowid, estável).
+
+    Como no OrdenadorExterno, as linhas ficam em memória enquanto cabem em
+    `linhas_por_lote` e `limite_memoria`; o banco só é criado quando um
+    deles é excedido, e `limite_memoria` passa a limitar o cache de páginas.
+    """
+
+    TAMANHO_INSERCAO = 10_000
+
+    def __init__(self, chave, linhas_por_lote=200_000, pasta_temp=None, limite_memoria=None):
+        self.chave = chave
+        self.linhas_por_lote = linhas_por_lote
+        self.pasta_temp = pasta_temp
+        self.limite_memoria = limite_memoria
+        self.total_linhas = 0
+        self.caminho = None
+        self._conexao = None
+        self._buffer = []
+        self._limite = _LimiteLinhas(limite_memoria, linhas_por_lote) if limite_memoria else None
+
+    @property
+    def transbordou(self):
+        """Se as linhas já foram para o banco (senão estão todas em memória)."""
+        return self._conexao is not None
+
+    def adicionar(self, linha):
+        self._buffer.append(linha)
+        self.total_linhas += 1
+        if self._limite is not None and len(self._buffer) % AMOSTRAGEM == 1:
+            self._limite.amostrar(linha)
+        if len(self._buffer) >= (self._limite.linhas if self._limite is not None else self.linhas_por_lote):
+            self._gravar_pendentes()
+
+    def adicionar_varias(self, linhas):
+        for linha in linhas:
+            self.adicionar(linha)
+
+    def ordenados(self):
+        """Gera todas as linhas recebidas, em ordem, sem materializá-las."""
+        if self._conexao is None:
+            self._buffer.sort(key=self.chave)
+            yield from self._buffer
+            return
+
+        self._gravar_pendentes()
+        cursor = self._conexao.execute("SELECT dados FROM linhas ORDER BY chave, rowid")
+        while True:
+            bloco = cursor.fetchmany(TAMANHO_BLOCO)
+            if not bloco:
+                return
+            for (dados,) in bloco:
+                yield pickle.loads(dados)
+
+    def fechar(self):
+        self._buffer = []
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+        if self.caminho:
+            try:
+                os.remove(self.caminho)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _abrir_banco(self):
+        fd, self.caminho = tempfile.mkstemp(prefix="ordenacao_", suffix=".sqlite", dir=self.pasta_temp)
+        os.close(fd)
+        self._conexao = sqlite3.connect(self.caminho)
+        self._conexao.execute("PRAGMA journal_mode=OFF")
+        self._conexao.execute("PRAGMA synchronous=OFF")
+        self._conexao.execute("PRAGMA temp_store=FILE")
+        if self.limite_memoria:
+            self._conexao.execute(f"PRAGMA cache_size=-{max(self.limite_memoria // 1024, 1024)}")
+        self._conexao.execute("CREATE TABLE linhas (chave, dados BLOB)")
+
+    def _gravar_pendentes(self):
+        if not self._buffer:
+            return
+        if self._conexao is None:
+            self._abrir_banco()
+        for inicio in range(0, len(self._buffer), self.TAMANHO_INSERCAO):
+            self._conexao.executemany("INSERT INTO linhas VALUES (?, ?)", [
+                (self.chave(linha), pickle.dumps(linha, pickle.HIGHEST_PROTOCOL))
+                for linha in self._buffer[inicio:inicio + self.TAMANHO_INSERCAO]
+            ])
+        self._buffer = []
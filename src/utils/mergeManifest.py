@@ -0,0 +1,109 @@
+import os
+import json
+import hashlib
+
+TAMANHO_LEITURA_HASH = 1 << 20
+
+
+def hash_arquivo(caminho):
+    """Hash (blake2b) do conteúdo do arquivo."""
+    resumo = hashlib.blake2b(digest_size=20)
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_LEITURA_HASH), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+class ManifestoMesclagem:
+    """
+    Manifesto de uma mesclagem, gravado ao lado da saída: a `identidade`
+    das opções que definem as colunas e, para cada arquivo mesclado, o
+    caminho, tamanho, data de modificação, hash do conteúdo, o cabeçalho e
+    o intervalo de linhas que ele ocupa na saída.
+
+    O manifesto anterior só vale se a identidade (definida depois, em
+    definir_identidade()) for a mesma e a saída não tiver mudado desde que
+    ele foi gravado; senão tudo é mesclado de novo. Os cabeçalhos não
+    dependem da saída: o de um arquivo inalterado vale em qualquer caso.
+    Um arquivo com o mesmo tamanho e data de modificação é considerado
+    inalterado sem ser lido; se só a data mudou, o hash decide.
+    """
+
+    def __init__(self, caminho_saida):
+        self.caminho_saida = caminho_saida
+        self.caminho = f"{os.path.splitext(caminho_saida)[0]}.manifesto.json"
+        self.identidade = None
+        self.anteriores = {}
+        self.atuais = {}
+        self._manifesto = {}
+        self._salvos = {}
+        self._hashes = {}
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, encoding="utf-8") as arquivo:
+                self._manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            return
+        self._salvos = {entrada['arquivo']: entrada for entrada in self._manifesto.get('arquivos', [])}
+
+    def definir_identidade(self, identidade):
+        """Identidade da nova mesclagem; com ela e a saída inalterada, as entradas anteriores valem."""
+        self.identidade = identidade
+        try:
+            saida = os.stat(self.caminho_saida)
+        except OSError:
+            return
+        if (self._manifesto.get('identidade') == identidade
+                and self._manifesto.get('saida') == [saida.st_size, saida.st_mtime_ns]):
+            self.anteriores = self._salvos
+
+    def _hash(self, caminho):
+        caminho = os.path.abspath(caminho)
+        if caminho not in self._hashes:
+            self._hashes[caminho] = hash_arquivo(caminho)
+        return self._hashes[caminho]
+
+    def _inalterada(self, entrada, caminho):
+        if entrada is None:
+            return None
+        info = os.stat(caminho)
+        if info.st_size != entrada['tamanho']:
+            return None
+        if info.st_mtime_ns != entrada['modificado'] and self._hash(caminho) != entrada['hash']:
+            return None
+        return entrada
+
+    def reaproveitavel(self, caminho):
+        """Entrada do arquivo no manifesto anterior se o conteúdo não mudou; None se ele é novo ou mudou."""
+        return self._inalterada(self.anteriores.get(os.path.abspath(caminho)), caminho)
+
+    def cabecalho(self, caminho):
+        """Cabeçalho gravado do arquivo se o conteúdo não mudou; None se é preciso lê-lo."""
+        entrada = self._inalterada(self._salvos.get(os.path.abspath(caminho)), caminho)
+        return entrada.get('cabecalho') if entrada else None
+
+    def registrar(self, caminho, inicio, fim, hash_conteudo=None, cabecalho=None):
+        """Registra as linhas [inicio, fim] da nova saída como vindas do arquivo."""
+        info = os.stat(caminho)
+        self.atuais[os.path.abspath(caminho)] = {
+            'arquivo': os.path.abspath(caminho),
+            'tamanho': info.st_size,
+            'modificado': info.st_mtime_ns,
+            'hash': hash_conteudo or self._hash(caminho),
+            'cabecalho': cabecalho,
+            'linhas': [inicio, fim],
+        }
+
+    def salvar(self):
+        """Grava o manifesto (de forma atômica) depois que a nova saída foi salva."""
+        saida = os.stat(self.caminho_saida)
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                'identidade': self.identidade,
+                'saida': [saida.st_size, saida.st_mtime_ns],
+                'arquivos': list(self.atuais.values()),
+            }, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
@@ -0,0 +1,278 @@
+import os
+import csv
+from datetime import time as dt_time
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment
+from openpyxl.utils import get_column_letter
+from utils.dateParser import como_datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+LIMITE_LINHAS_XLSX = 1_048_576
+
+
+def _segundos(valor):
+    """Duração (fração de dia ou time) em segundos inteiros; None se não for uma duração."""
+    if isinstance(valor, dt_time):
+        return valor.hour * 3600 + valor.minute * 60 + valor.second
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return round(valor * 86400)
+    return None
+
+
+def _data_hora(valor):
+    """Data (serial do Excel, datetime ou texto dd/mm/aaaa) como datetime; None se não for uma data."""
+    return como_datetime(valor)
+
+
+
+class SaidaArquivo:
+    """
+    Destino de gravação alimentado em blocos de linhas.
+
+    `colunas` são os títulos e `tipos` o tipo de cada coluna: 'data' (serial
+    do Excel), 'duracao' (fração de dia), 'numero' ou 'texto'. `formatos`,
+    opcional, traz o formato numérico de cada coluna para quem o suporta. Usado como
+    gerenciador de contexto: fechar() conclui o arquivo e, se houver erro
+    (inclusive no próprio fechar()), o arquivo parcial e as tabelas
+    auxiliares são removidos. `datas_descartadas` conta as datas que o
+    destino não conseguiu representar e gravou vazias.
+    """
+    extensao = ""
+
+    def __init__(self, caminho, colunas, tipos, formatos=None):
+        self.caminho = caminho
+        self.colunas = list(colunas)
+        self.tipos = list(tipos)
+        self.formatos = list(formatos) if formatos else [None] * len(self.colunas)
+        self.total_linhas = 0
+        self.datas_descartadas = 0
+        self._tabelas = []
+
+    def escrever(self, linhas):
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+    def adicionar_tabela(self, titulo, colunas, tipos, linhas):
+        """
+        Grava uma tabela auxiliar (ex.: um resumo) junto com a saída. Por
+        padrão vai para um arquivo irmão com o título no nome; retorna o caminho.
+        """
+        base, ext = os.path.splitext(self.caminho)
+        with type(self)(f"{base}_{titulo.lower()}{ext}", colunas, tipos) as saida:
+            saida.escrever(list(linhas))
+        self._tabelas.append(saida.caminho)
+        self.datas_descartadas += saida.datas_descartadas
+        return saida.caminho
+
+    def descartar(self):
+        for caminho in [self.caminho, *self._tabelas]:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.descartar()
+            return
+        try:
+            self.fechar()
+        except Exception:
+            self.descartar()
+            raise
+
+
+class SaidaXlsx(SaidaArquivo):
+    """
+    xlsx em modo write-only; passa para uma nova aba ao atingir o limite de
+    linhas do Excel. Sem `formatos`, as colunas de duração usam hh:mm:ss.
+    """
+    extensao = ".xlsx"
+
+    def __init__(self, caminho, colunas, tipos, formatos=None):
+        super().__init__(caminho, colunas, tipos, formatos)
+        if not formatos:
+            self.formatos = ['hh:mm:ss' if tipo == 'duracao' else None for tipo in self.tipos]
+        self._wb = Workbook(write_only=True)
+        self._sheet = None
+        self._linhas_aba = 0
+        self._nova_aba()
+
+    def _nova_aba(self):
+        numero = len(self._wb.worksheets) + 1
+        self._sheet = self._wb.create_sheet("Sheet" if numero == 1 else f"Sheet{numero}")
+        self._sheet.append(self._cabecalho(self._sheet, self.colunas))
+        self._linhas_aba = 1
+
+        # O formato é definido uma vez por coluna: na dimensão da coluna e numa
+        # célula reutilizada (append grava o valor na hora, basta trocar .value)
+        self._celulas_formatadas = []
+        for indice, formato in enumerate(self.formatos):
+            if not formato:
+                continue
+            self._sheet.column_dimensions[get_column_letter(indice + 1)].number_format = formato
+            cell = WriteOnlyCell(self._sheet)
+            cell.number_format = formato
+            self._celulas_formatadas.append((indice, cell))
+
+    @staticmethod
+    def _cabecalho(sheet, colunas):
+        header = []
+        for title in colunas:
+            cell = WriteOnlyCell(sheet, value=title)
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal='center')
+            header.append(cell)
+        return header
+
+    def escrever(self, linhas):
+        celulas = self._celulas_formatadas
+        for row in linhas:
+            if self._linhas_aba >= LIMITE_LINHAS_XLSX:
+                self._nova_aba()
+                celulas = self._celulas_formatadas
+            row = list(row)
+            for indice, cell in celulas:
+                cell.value = row[indice]
+                row[indice] = cell
+            self._sheet.append(row)
+            self._linhas_aba += 1
+        self.total_linhas += len(linhas)
+
+    def adicionar_tabela(self, titulo, colunas, tipos, linhas):
+        sheet = self._wb.create_sheet(titulo)
+        sheet.append(self._cabecalho(sheet, colunas))
+        for row in linhas:
+            sheet.append(row)
+        return self.caminho
+
+    def fechar(self):
+        self._wb.save(self.caminho)
+
+    def descartar(self):
+        self._wb = None
+
+
+class SaidaCsv(SaidaArquivo):
+    """CSV em UTF-8 com BOM, separado por ';' e com vírgula decimal, como o Excel em pt-BR espera."""
+    extensao = ".csv"
+
+    def __init__(self, caminho, colunas, tipos, formatos=None):
+        super().__init__(caminho, colunas, tipos, formatos)
+        self._formatadores = [self._formatador(tipo) for tipo in self.tipos]
+        self._arquivo = open(caminho, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._arquivo, delimiter=";")
+        self._writer.writerow(self.colunas)
+
+    @staticmethod
+    def _formatador(tipo):
+        def texto(valor):
+            return "" if valor is None else str(valor)
+
+        def numero(valor):
+            if isinstance(valor, float):
+                return str(valor).replace(".", ",")
+            return texto(valor)
+
+        def data(valor):
+            data_hora = _data_hora(valor)
+            return data_hora.strftime("%d/%m/%Y %H:%M:%S") if data_hora else texto(valor)
+
+        def duracao(valor):
+            segundos = _segundos(valor)
+            if segundos is None:
+                return texto(valor)
+            return f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}"
+
+        return {'data': data, 'duracao': duracao, 'numero': numero}.get(tipo, texto)
+
+    def escrever(self, linhas):
+        formatadores = self._formatadores
+        self._writer.writerows(
+            [formatar(valor) for formatar, valor in zip(formatadores, row)] for row in linhas
+        )
+        self.total_linhas += len(linhas)
+
+    def fechar(self):
+        self._arquivo.close()
+
+    def descartar(self):
+        self._arquivo.close()
+        super().descartar()
+
+
+class SaidaParquet(SaidaArquivo):
+    """
+    Parquet (requer pyarrow). As linhas são acumuladas até `linhas_por_grupo`
+    e gravadas como um row group, então só um grupo fica em memória.
+    """
+    extensao = ".parquet"
+    linhas_por_grupo = 65_536
+
+    def __init__(self, caminho, colunas, tipos, formatos=None):
+        if pa is None:
+            raise RuntimeError("A saída Parquet requer o pacote pyarrow")
+        super().__init__(caminho, colunas, tipos, formatos)
+        tipos_arrow = {'data': pa.timestamp('s'), 'duracao': pa.duration('s'), 'numero': pa.float64()}
+        self._schema = pa.schema([
+            (coluna, tipos_arrow.get(tipo, pa.string())) for coluna, tipo in zip(self.colunas, self.tipos)
+        ])
+        self._writer = pq.ParquetWriter(caminho, self._schema)
+        self._pendentes = []
+
+    def escrever(self, linhas):
+        self._pendentes.extend(linhas)
+        self.total_linhas += len(linhas)
+        if len(self._pendentes) >= self.linhas_por_grupo:
+            self._gravar_grupo()
+
+    def _gravar_grupo(self):
+        if not self._pendentes:
+            return
+        colunas = list(zip(*self._pendentes))
+        arrays = [
+            pa.array(self._converter_coluna(valores, tipo), type=campo.type)
+            for valores, tipo, campo in zip(colunas, self.tipos, self._schema)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        self._pendentes = []
+
+    def _converter_coluna(self, valores, tipo):
+        if tipo == 'data':
+            datas = [_data_hora(valor) for valor in valores]
+            # Datas presentes mas não reconhecidas (ex.: "N/D") ficam nulas e são contadas
+            self.datas_descartadas += sum(
+                1 for valor, data in zip(valores, datas)
+                if data is None and valor is not None and not (isinstance(valor, str) and not valor.strip())
+            )
+            return datas
+        if tipo == 'duracao':
+            return [_segundos(valor) for valor in valores]
+        if tipo == 'numero':
+            return [
+                float(valor) if isinstance(valor, (int, float)) and not isinstance(valor, bool) else None
+                for valor in valores
+            ]
+        return [None if valor is None else str(valor) for valor in valores]
+
+    def fechar(self):
+        self._gravar_grupo()
+        self._writer.close()
+
+    def descartar(self):
+        self._writer.close()
+        super().descartar()
+
+
+SAIDAS = {'xlsx': SaidaXlsx, 'csv': SaidaCsv}
+if pa is not None:
+    SAIDAS['parquet'] = SaidaParquet
@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+
+
+class MetricasProgresso:
+    """
+    Vazão e tempo restante de um processamento, calculados a partir das
+    linhas e bytes acumulados. atualizar() só devolve as métricas quando
+    já passou `intervalo` segundos desde a última vez (None caso contrário),
+    para não inundar a interface.
+    """
+
+    def __init__(self, total_linhas, intervalo=0.25):
+        self.total_linhas = total_linhas
+        self.intervalo = intervalo
+        self._inicio = time.perf_counter()
+        self._ultima = 0.0
+
+    def atualizar(self, linhas, bytes_lidos, forcar=False):
+        agora = time.perf_counter()
+        if not forcar and agora - self._ultima < self.intervalo:
+            return None
+        self._ultima = agora
+
+        decorrido = max(agora - self._inicio, 1e-9)
+        vazao = linhas / decorrido
+        restantes = max(self.total_linhas - linhas, 0)
+        return {
+            'linhas': linhas,
+            'total_linhas': self.total_linhas,
+            'linhas_por_segundo': vazao,
+            'bytes': bytes_lidos,
+            'decorrido': decorrido,
+            'eta': restantes / vazao if vazao else None,
+        }
+
+
+class TemposEtapas:
+    """Tempo acumulado por etapa (leitura, conversão, ordenação, gravação...)."""
+
+    def __init__(self):
+        self.tempos = {}
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.adicionar(etapa, time.perf_counter() - inicio)
+
+    def adicionar(self, etapa, segundos):
+        self.tempos[etapa] = self.tempos.get(etapa, 0.0) + segundos
+
+    def somar(self, tempos):
+        for etapa, segundos in tempos.items():
+            self.adicionar(etapa, segundos)
+
+    def resumo(self):
+        return " · ".join(f"{etapa} {segundos:.1f}s".replace(".", ",") for etapa, segundos in self.tempos.items())
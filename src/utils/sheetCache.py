@@ -0,0 +1,88 @@
+import os
+import time
+import hashlib
+import tempfile
+from utils.xlsxReader import PlanilhaXlsx
+
+# Partes do pacote das quais os valores de qualquer aba dependem
+PARTES_COMPARTILHADAS = ("xl/workbook.xml", "xl/sharedStrings.xml", "xl/styles.xml")
+TAMANHO_LEITURA = 1 << 20
+
+
+def _atualizar_hash(digest, zip_file, nome):
+    with zip_file.open(nome) as fonte:
+        while True:
+            bloco = fonte.read(TAMANHO_LEITURA)
+            if not bloco:
+                return
+            digest.update(bloco)
+
+
+class CacheAbas:
+    """
+    Cache em disco das linhas já convertidas de cada aba.
+
+    A chave de uma aba combina a versão da conversão, o hash das partes
+    compartilhadas do xlsx (workbook, sharedStrings e styles), o nome da aba
+    e o hash do XML da própria aba. As entradas usam o mesmo formato de
+    blocos de externalSort (gravar_linhas/ler_linhas), então o arquivo
+    temporário produzido por um worker pode ser movido direto para o cache.
+    Entradas sem uso há mais de `dias_validade` dias são removidas ao abrir.
+    """
+
+    def __init__(self, pasta=None, versao=1, dias_validade=30):
+        self.pasta = pasta or os.path.join(tempfile.gettempdir(), "agitel_cache")
+        self.versao = versao
+        os.makedirs(self.pasta, exist_ok=True)
+        self._remover_expirados(dias_validade * 86400)
+
+    def chaves(self, caminho_xlsx, variante=""):
+        """
+        Retorna {título da aba: chave} para todas as abas do arquivo.
+        `variante` distingue opções que mudam a conversão (ex.: regras de região).
+        """
+        with PlanilhaXlsx(caminho_xlsx) as planilha:
+            zip_file = planilha._zip
+            nomes = set(zip_file.namelist())
+
+            base = hashlib.blake2b(f"v{self.versao}|{variante}".encode(), digest_size=20)
+            for nome in PARTES_COMPARTILHADAS:
+                if nome in nomes:
+                    _atualizar_hash(base, zip_file, nome)
+
+            chaves = {}
+            for aba in planilha.worksheets:
+                digest = base.copy()
+                digest.update(aba.title.encode("utf-8"))
+                _atualizar_hash(digest, zip_file, aba._caminho_xml)
+                chaves[aba.title] = digest.hexdigest()
+        return chaves
+
+    def caminho(self, chave):
+        """Caminho da entrada em cache, ou None se ela não existir."""
+        caminho = self._caminho_entrada(chave)
+        if not os.path.exists(caminho):
+            return None
+        os.utime(caminho)
+        return caminho
+
+    def novo_temporario(self):
+        """Cria um arquivo temporário na pasta do cache; retorna (fd, caminho)."""
+        return tempfile.mkstemp(prefix="aba_", suffix=".tmp", dir=self.pasta)
+
+    def guardar(self, chave, caminho_temp):
+        """Move um arquivo gravado com gravar_linhas para o cache."""
+        os.replace(caminho_temp, self._caminho_entrada(chave))
+
+    def _caminho_entrada(self, chave):
+        return os.path.join(self.pasta, f"{chave}.cache")
+
+    def _remover_expirados(self, idade_maxima):
+        limite = time.time() - idade_maxima
+        for nome in os.listdir(self.pasta):
+            caminho = os.path.join(self.pasta, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
@@ -0,0 +1,307 @@
+import re
+import posixpath
+import zipfile
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, MAC_EPOCH
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+TAG_ROW = NS_MAIN + "row"
+TAG_CELL = NS_MAIN + "c"
+TAG_VALUE = NS_MAIN + "v"
+TAG_TEXT = NS_MAIN + "t"
+TAG_RUN = NS_MAIN + "r"
+TAG_INLINE = NS_MAIN + "is"
+TAG_SI = NS_MAIN + "si"
+TAG_SHEET_DATA = NS_MAIN + "sheetData"
+TAG_DIMENSION = NS_MAIN + "dimension"
+TAG_COL = NS_MAIN + "col"
+
+RE_DIMENSION = re.compile(r"^[A-Z]+\d+:[A-Z]+(\d+)$|^[A-Z]+(\d+)$")
+
+CelulaXlsx = namedtuple("CelulaXlsx", ["row", "column", "value"])
+
+
+def _texto_rico(elemento):
+    """Concatena o texto de um <si>/<is>, ignorando as anotações fonéticas (rPh)."""
+    partes = []
+    for filho in elemento:
+        if filho.tag == TAG_TEXT:
+            partes.append(filho.text or "")
+        elif filho.tag == TAG_RUN:
+            partes.append(filho.findtext(TAG_TEXT) or "")
+    return "".join(partes)
+
+
+def _cast_number(value):
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+class PlanilhaXlsx:
+    """
+    Leitor de xlsx que interpreta o XML das abas diretamente do zip.
+
+    Expõe o subconjunto da API de somente leitura do openpyxl usado pelos
+    serviços (worksheets, sheetnames, active, [título], iter_rows, max_row, close),
+    sem criar objetos de célula nem aplicar estilos. iter_rows aceita ainda
+    `columns`, um conjunto de índices (base 0) a decodificar; as demais
+    colunas vêm como None. Células com fórmula retornam o valor em cache.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._zip = zipfile.ZipFile(caminho)
+        self._shared_strings = None
+        self.epoch = WINDOWS_EPOCH
+        self._indice_ativa = 0
+        self.date_styles, self.timedelta_styles = self._ler_estilos()
+        self.worksheets = [AbaXlsx(self, titulo, caminho_xml) for titulo, caminho_xml in self._ler_abas()]
+
+    @property
+    def sheetnames(self):
+        return [aba.title for aba in self.worksheets]
+
+    @property
+    def active(self):
+        """Aba ativa ao salvar o arquivo (activeTab do workbookView), como o wb.active do openpyxl."""
+        if not self.worksheets:
+            return None
+        return self.worksheets[min(self._indice_ativa, len(self.worksheets) - 1)]
+
+    def __getitem__(self, titulo):
+        for aba in self.worksheets:
+            if aba.title == titulo:
+                return aba
+        raise KeyError(f"Worksheet {titulo} does not exist.")
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def shared_strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            if "xl/sharedStrings.xml" in self._zip.namelist():
+                with self._zip.open("xl/sharedStrings.xml") as fonte:
+                    for _, elemento in iterparse(fonte):
+                        if elemento.tag == TAG_SI:
+                            self._shared_strings.append(_texto_rico(elemento))
+                            elemento.clear()
+        return self._shared_strings
+
+    def _ler_abas(self):
+        alvos = {}
+        with self._zip.open("xl/_rels/workbook.xml.rels") as fonte:
+            for _, elemento in iterparse(fonte):
+                if elemento.tag == NS_PKG_REL + "Relationship":
+                    alvo = elemento.get("Target")
+                    if alvo.startswith("/"):
+                        alvo = alvo.lstrip("/")
+                    else:
+                        alvo = posixpath.normpath(posixpath.join("xl", alvo))
+                    alvos[elemento.get("Id")] = alvo
+
+        abas = []
+        with self._zip.open("xl/workbook.xml") as fonte:
+            for _, elemento in iterparse(fonte):
+                if elemento.tag == NS_MAIN + "workbookPr":
+                    if elemento.get("date1904") in ("1", "true"):
+                        self.epoch = MAC_EPOCH
+                elif elemento.tag == NS_MAIN + "workbookView":
+                    self._indice_ativa = int(elemento.get("activeTab", 0))
+                elif elemento.tag == NS_MAIN + "sheet":
+                    abas.append((elemento.get("name"), alvos[elemento.get(NS_REL + "id")]))
+        return abas
+
+    def _ler_estilos(self):
+        date_styles, timedelta_styles = set(), set()
+        if "xl/styles.xml" not in self._zip.namelist():
+            return date_styles, timedelta_styles
+
+        formatos = dict(BUILTIN_FORMATS)
+        estilo_id = 0
+        dentro_cell_xfs = False
+        with self._zip.open("xl/styles.xml") as fonte:
+            for evento, elemento in iterparse(fonte, events=("start", "end")):
+                if elemento.tag == NS_MAIN + "cellXfs":
+                    dentro_cell_xfs = evento == "start"
+                elif evento == "end" and elemento.tag == NS_MAIN + "numFmt":
+                    formatos[int(elemento.get("numFmtId"))] = elemento.get("formatCode")
+                elif evento == "end" and dentro_cell_xfs and elemento.tag == NS_MAIN + "xf":
+                    formato = formatos.get(int(elemento.get("numFmtId", 0)))
+                    if is_date_format(formato):
+                        date_styles.add(estilo_id)
+                        if is_timedelta_format(formato):
+                            timedelta_styles.add(estilo_id)
+                    estilo_id += 1
+        return date_styles, timedelta_styles
+
+
+class AbaXlsx:
+    def __init__(self, planilha, title, caminho_xml):
+        self.parent = planilha
+        self.title = title
+        self._caminho_xml = caminho_xml
+        self._max_row = None
+        self._fonte = None
+        self._lidos = 0
+
+    @property
+    def max_row(self):
+        if self._max_row is None:
+            with self.parent._zip.open(self._caminho_xml) as fonte:
+                for _, elemento in iterparse(fonte, events=("start",)):
+                    if elemento.tag == TAG_DIMENSION:
+                        match = RE_DIMENSION.match(elemento.get("ref", ""))
+                        if match:
+                            self._max_row = int(match.group(1) or match.group(2))
+                        break
+                    if elemento.tag == TAG_SHEET_DATA:
+                        break
+        return self._max_row
+
+    @property
+    def larguras_colunas(self):
+        """{índice da coluna (base 0): largura} definidas em <cols>, lidas sem percorrer as linhas."""
+        larguras = {}
+        with self.parent._zip.open(self._caminho_xml) as fonte:
+            for _, elemento in iterparse(fonte, events=("start", "end")):
+                if elemento.tag == TAG_SHEET_DATA:
+                    break
+                if elemento.tag == TAG_COL and elemento.get("width"):
+                    for coluna in range(int(elemento.get("min")), int(elemento.get("max")) + 1):
+                        larguras[coluna - 1] = float(elemento.get("width"))
+        return larguras
+
+    @property
+    def tamanho_xml(self):
+        return self.parent._zip.getinfo(self._caminho_xml).file_size
+
+    @property
+    def bytes_lidos(self):
+        """Bytes (descompactados) do XML da aba já lidos pela iteração de linhas."""
+        return self._fonte.tell() if self._fonte is not None else self._lidos
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=False, columns=None, raw_dates=False):
+        """
+        Gera as linhas da aba como tuplas indexadas pela coluna (base 0).
+
+        Linhas ausentes no XML são geradas vazias, como no openpyxl. Com
+        values_only=False cada posição é uma CelulaXlsx(row, column, value).
+        Com raw_dates=True, células de data/hora vêm como o número serial do
+        Excel, sem conversão para datetime/time.
+
+        Quem parar de iterar antes do fim deve chamar close() no gerador
+        (ou usar contextlib.closing), para fechar já o XML da aba no zip.
+        """
+        largura = max(columns) + 1 if columns else 0
+        vazia = (None,) * largura
+        proxima = min_row
+
+        linhas = self._ler_linhas(min_row, max_row, columns, raw_dates)
+        try:
+            for numero, valores in linhas:
+                while proxima < numero:
+                    yield vazia if values_only else self._como_celulas(proxima, vazia)
+                    proxima += 1
+                if len(valores) < largura:
+                    valores.extend([None] * (largura - len(valores)))
+                yield tuple(valores) if values_only else self._como_celulas(numero, valores)
+                proxima = numero + 1
+        finally:
+            linhas.close()
+
+    @staticmethod
+    def _como_celulas(numero, valores):
+        return tuple(CelulaXlsx(numero, coluna, valor) for coluna, valor in enumerate(valores, 1))
+
+    def _ler_linhas(self, min_row, max_row, columns, raw_dates):
+        planilha = self.parent
+        date_styles = set() if raw_dates else planilha.date_styles
+        timedelta_styles = planilha.timedelta_styles
+        colunas_cache = {}
+        numero = 0
+
+        with planilha._zip.open(self._caminho_xml) as fonte:
+            self._fonte = fonte
+            try:
+                sheet_data = None
+                for evento, elemento in iterparse(fonte, events=("start", "end")):
+                    if evento == "start":
+                        if elemento.tag == TAG_SHEET_DATA:
+                            sheet_data = elemento
+                        continue
+                    if elemento.tag != TAG_ROW:
+                        continue
+
+                    r = elemento.get("r")
+                    numero = int(r) if r else numero + 1
+                    if max_row is not None and numero > max_row:
+                        return
+                    if numero < min_row:
+                        sheet_data.clear()
+                        continue
+
+                    valores = []
+                    coluna = -1
+                    for celula in elemento:
+                        ref = celula.get("r")
+                        if ref:
+                            letras = ref.rstrip("0123456789")
+                            coluna = colunas_cache.get(letras)
+                            if coluna is None:
+                                coluna = colunas_cache[letras] = column_index_from_string(letras) - 1
+                        else:
+                            coluna += 1
+                        if columns is not None and coluna not in columns:
+                            continue
+
+                        if coluna >= len(valores):
+                            valores.extend([None] * (coluna + 1 - len(valores)))
+                        valores[coluna] = self._valor_celula(celula, date_styles, timedelta_styles)
+
+                    sheet_data.clear()
+                    yield numero, valores
+            finally:
+                # Interrompida ou concluída, a aba não segura mais o XML aberto
+                self._lidos = fonte.tell()
+                self._fonte = None
+
+    def _valor_celula(self, celula, date_styles, timedelta_styles):
+        tipo = celula.get("t", "n")
+        if tipo == "inlineStr":
+            inline = celula.find(TAG_INLINE)
+            return _texto_rico(inline) if inline is not None else None
+
+        valor = celula.findtext(TAG_VALUE)
+        if not valor:
+            return None
+        if tipo == "n":
+            valor = _cast_number(valor)
+            estilo = int(celula.get("s", 0))
+            if estilo in date_styles:
+                try:
+                    return from_excel(valor, self.parent.epoch, timedelta=estilo in timedelta_styles)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return valor
+        if tipo == "s":
+            return self.parent.shared_strings[int(valor)]
+        if tipo == "b":
+            return bool(int(valor))
+        if tipo == "d":
+            return from_ISO8601(valor)
+        return valor
@@ -0,0 +1,123 @@
+import gc
+import os
+import sys
+import time
+import random
+from datetime import datetime, time as dt_time, timedelta
+from openpyxl.utils import datetime as xl_datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.LeituraAgitel import LeitorAgitel
+
+INDICES = {'data': 0, 'origem': 1, 'servico': 2, 'regiao': 3, 'destino': 4, 'duracao': 5, 'preco': 6}
+
+
+class ConversorAnterior(LeitorAgitel):
+    """
+    Conversão linha a linha como era feita antes do conversor compilado:
+    lookups em dicionário por campo e a duração interpretada duas vezes.
+    Os conversores de campo também são os da época, fixados aqui, para a
+    comparação não mudar quando os do LeitorAgitel mudarem.
+    """
+
+    def _process_row(self, row, indices):
+        try:
+            data = self._convert_date(row[indices.get('data', -1)]) or ""
+            origem = str(row[indices.get('origem', -1)] or "").strip()
+            destino = str(row[indices.get('destino', -1)] or "").strip()
+
+            return [
+                data,
+                origem,
+                str(row[indices.get('servico', -1)] or ""),
+                str(row[indices.get('regiao', -1)] or ""),
+                destino,
+                self._convert_duration(row[indices.get('duracao', -1)]),
+                self._duration_to_minutes(row[indices.get('duracao', -1)]),
+                self._parse_currency(row[indices.get('preco', -1)])
+            ]
+        except Exception:
+            return None
+
+    def _convert_date(self, value):
+        if isinstance(value, datetime):
+            return xl_datetime.to_excel(value)
+        return value
+
+    def _parse_currency(self, value):
+        try:
+            return float(str(value).replace('R$', '').replace(',', '.').strip())
+        except:
+            return 0.0
+
+    def _convert_duration(self, value):
+        if isinstance(value, dt_time):
+            return value.hour/24 + value.minute/1440 + value.second/86400
+        elif isinstance(value, str):
+            try:
+                h, m, s = map(int, value.split(':'))
+                return h/24 + m/1440 + s/86400
+            except:
+                return 0.0
+        return value
+
+    def _duration_to_minutes(self, value):
+        if isinstance(value, dt_time):
+            return round(value.hour * 60 + value.minute + value.second / 60, 1)
+        return 0.0
+
+
+def gerar_linhas(quantidade, seed=42):
+    rnd = random.Random(seed)
+    inicio = datetime(2024, 1, 1)
+    linhas = []
+    for _ in range(quantidade):
+        minuto, segundo = rnd.randint(0, 59), rnd.randint(0, 59)
+        duracao = dt_time(0, minuto, segundo) if rnd.random() < 0.5 else f"00:{minuto:02d}:{segundo:02d}"
+        linhas.append((
+            inicio + timedelta(minutes=rnd.randint(0, 40000)),
+            str(rnd.randint(200, 260)),
+            rnd.choice(["Local", "DDD", "Celular"]),
+            rnd.choice(["Fixo Local", "Movel VC1", "LDN Fixo", ""]),
+            str(rnd.randint(10**9, 10**10)),
+            duracao,
+            rnd.choice(["R$ 0,12", "R$ 0,50", "R$ 1,05", 0.33]),
+        ))
+    return linhas
+
+
+def medir(funcoes, linhas, repeticoes):
+    """
+    Mede as funções de forma intercalada (A, B, A, B...) com o coletor de lixo
+    desligado, como o timeit, e retorna a melhor taxa de cada uma em linhas/s.
+    """
+    melhores = [float("inf")] * len(funcoes)
+    gc.disable()
+    try:
+        for _ in range(repeticoes):
+            for posicao, funcao in enumerate(funcoes):
+                inicio = time.perf_counter()
+                for linha in linhas:
+                    funcao(linha)
+                melhores[posicao] = min(melhores[posicao], time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return [len(linhas) / melhor for melhor in melhores]
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    linhas = gerar_linhas(quantidade)
+
+    anterior = ConversorAnterior()
+    compilado = LeitorAgitel()._build_row_converter(INDICES)
+
+    taxa_anterior, taxa_compilada = medir(
+        [lambda linha: anterior._process_row(linha, INDICES), compilado], linhas, 5
+    )
+
+    print(f"Linhas convertidas por repetição: {quantidade}")
+    print(f"Método anterior (_process_row): {taxa_anterior:,.0f} linhas/s")
+    print(f"Conversor compilado:            {taxa_compilada:,.0f} linhas/s")
+    print(f"Ganho: {taxa_compilada / taxa_anterior:.2f}x")
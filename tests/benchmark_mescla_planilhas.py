@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.MesclaPlanilhas import PlanilhaMesclagemWorker, _abrir_entrada, _linhas_selecionadas
+
+
+def gerar_planilha_larga(caminho, linhas, colunas, seed):
+    """Planilha com `colunas` colunas misturando textos, números e datas, como os relatórios mensais."""
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Dados")
+    ws.append([f"Coluna {indice + 1}" for indice in range(colunas)])
+    inicio = datetime(2024, 1, 1)
+    for _ in range(linhas):
+        ws.append([
+            rnd.random() * 1000 if indice % 3 == 0
+            else inicio + timedelta(minutes=rnd.randint(0, 44_640)) if indice % 3 == 1
+            else f"texto {rnd.randint(0, 500)}"
+            for indice in range(colunas)
+        ])
+    wb.save(caminho)
+
+
+def medir_leitura(arquivos, colunas, reader_backend, repeticoes):
+    """Melhor tempo para ler as colunas selecionadas de todos os arquivos; retorna (segundos, linhas)."""
+    melhor, total = None, 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        total = 0
+        for arquivo in arquivos:
+            wb = _abrir_entrada(arquivo, reader_backend)
+            try:
+                total += sum(1 for _ in _linhas_selecionadas(wb.active, colunas))
+            finally:
+                wb.close()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, total
+
+
+def medir_mesclagem(arquivos, colunas, reader_backend, pasta):
+    """Tempo da mesclagem completa (leitura e gravação da saída)."""
+    worker = PlanilhaMesclagemWorker(arquivos, pasta, f"mesclada_{reader_backend}", colunas,
+                                     reader_backend=reader_backend)
+    erros = []
+    worker.erro.connect(erros.append)
+    inicio = time.perf_counter()
+    worker.executar_mesclagem()
+    if erros:
+        raise RuntimeError(erros[0])
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da leitura com projeção de colunas na mesclagem")
+    parser.add_argument("--arquivos", type=int, default=4)
+    parser.add_argument("--linhas", type=int, default=5_000, help="linhas por arquivo")
+    parser.add_argument("--colunas", type=int, default=80, help="colunas de cada arquivo")
+    parser.add_argument("--selecionadas", type=int, default=6, help="colunas mantidas na saída")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-mesclagem", action="store_true", help="mede só a leitura")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="mescla_bench_")
+    try:
+        arquivos = [os.path.join(pasta, f"mes_{numero:02d}.xlsx") for numero in range(args.arquivos)]
+        inicio = time.perf_counter()
+        for numero, arquivo in enumerate(arquivos):
+            gerar_planilha_larga(arquivo, args.linhas, args.colunas, seed=numero)
+        print(f"{args.arquivos} arquivos de {args.linhas} linhas x {args.colunas} colunas "
+              f"({time.perf_counter() - inicio:.1f}s para gerar)")
+
+        passo = max(1, args.colunas // args.selecionadas)
+        colunas = list(range(0, args.colunas, passo))[:args.selecionadas]
+        print(f"Colunas selecionadas: {colunas}")
+
+        tempos = {}
+        for reader_backend in ["openpyxl", "xml"]:
+            segundos, total = medir_leitura(arquivos, colunas, reader_backend, args.repeticoes)
+            tempos[reader_backend] = segundos
+            print(f"leitura {reader_backend:<9} {segundos:7.2f}s  {total / segundos:>10,.0f} linhas/s")
+        print(f"Projeção de colunas: {tempos['openpyxl'] / tempos['xml']:.1f}x mais rápida na leitura")
+
+        if not args.sem_mesclagem:
+            completos = {reader_backend: medir_mesclagem(arquivos, colunas, reader_backend, pasta)
+                         for reader_backend in ["openpyxl", "xml"]}
+            for reader_backend, segundos in completos.items():
+                print(f"mesclagem {reader_backend:<9} {segundos:7.2f}s")
+            print(f"Mesclagem completa: {completos['openpyxl'] / completos['xml']:.1f}x mais rápida")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
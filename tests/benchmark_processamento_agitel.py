@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import shutil
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from gerador_planilhas_agitel import gerar_planilha
+
+# Configurações medidas por padrão: nome -> opções do ProcessadorAgitel
+CONFIGURACOES = {
+    'linha': {},
+    'colunar': {'conversion_mode': "colunar"},
+    'paralelo': {'workers': min(4, os.cpu_count() or 1)},
+    'csv': {'output_format': "csv"},
+    'resumo+dedup': {'summary': True, 'deduplicate': True},
+}
+# Queda de linhas/s (ou aumento de memória) acima disso em relação à base é tratada como regressão
+TOLERANCIA_REGRESSAO = 0.10
+
+
+def _pico_memoria_mb():
+    """Pico de memória residente deste processo e dos filhos já encerrados (workers do pool), em MB."""
+    if resource is not None:
+        fator = 1 if sys.platform == "darwin" else 1024
+        proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * fator
+        filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * fator
+        return max(proprio, filhos) / 1_048_576
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1_048_576
+    return None
+
+
+def _executar(caminho, opcoes, fila):
+    """Roda um processamento num processo novo, para o pico de memória ser só dele."""
+    from PyQt6.QtCore import QCoreApplication
+    from services.ProcessamentoAgitel import ProcessadorAgitel
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    processador = ProcessadorAgitel(caminho, True, **opcoes)
+    erros = []
+    processador.errorOccurred.connect(erros.append)
+
+    inicio = time.perf_counter()
+    processador.run()
+    decorrido = time.perf_counter() - inicio
+
+    saida = processador._get_output_path()
+    if os.path.exists(saida):
+        os.remove(saida)
+    fila.put({
+        'erro': erros[0] if erros else None,
+        'linhas': processador.rows_read,
+        'segundos': decorrido,
+        'linhas_por_segundo': processador.rows_read / decorrido if decorrido else 0.0,
+        'pico_memoria_mb': _pico_memoria_mb(),
+        'etapas': processador.stage_times.tempos,
+    })
+
+
+def medir(caminho, opcoes, repeticoes):
+    """Melhor de `repeticoes` execuções (cada uma num processo novo)."""
+    contexto = multiprocessing.get_context("spawn")
+    melhor = None
+    for _ in range(repeticoes):
+        fila = contexto.Queue()
+        processo = contexto.Process(target=_executar, args=(caminho, opcoes, fila))
+        processo.start()
+        resultado = fila.get()
+        processo.join()
+        if resultado['erro']:
+            raise RuntimeError(resultado['erro'])
+        if melhor is None or resultado['segundos'] < melhor['segundos']:
+            melhor = resultado
+    return melhor
+
+
+def comparar(resultados, base):
+    """Linhas com a variação em relação à base; marca as regressões."""
+    regressoes = 0
+    for nome, atual in resultados.items():
+        anterior = base.get(nome)
+        if not anterior:
+            continue
+        vazao = atual['linhas_por_segundo'] / anterior['linhas_por_segundo'] - 1
+        marcas = []
+        if vazao < -TOLERANCIA_REGRESSAO:
+            marcas.append("vazão")
+        if atual['pico_memoria_mb'] and anterior.get('pico_memoria_mb'):
+            memoria = atual['pico_memoria_mb'] / anterior['pico_memoria_mb'] - 1
+            if memoria > TOLERANCIA_REGRESSAO:
+                marcas.append("memória")
+        else:
+            memoria = 0.0
+        regressoes += bool(marcas)
+        aviso = f"  ⚠ REGRESSÃO ({', '.join(marcas)})" if marcas else ""
+        print(f"  {nome:<14} linhas/s {vazao:+.1%}   memória {memoria:+.1%}{aviso}")
+    return regressoes
+
+
+def _formatar(nome, resultado):
+    memoria = f"{resultado['pico_memoria_mb']:8.1f} MB" if resultado['pico_memoria_mb'] else "   indisponível"
+    etapas = " · ".join(f"{etapa} {segundos:.2f}s" for etapa, segundos in resultado['etapas'].items())
+    return (f"{nome:<14} {resultado['linhas_por_segundo']:>10,.0f} linhas/s  {resultado['segundos']:7.2f}s  "
+            f"{memoria}  {etapas}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do ProcessadorAgitel em planilhas sintéticas")
+    parser.add_argument("--arquivo", help="planilha a usar (por padrão uma sintética é gerada)")
+    parser.add_argument("--abas", type=int, default=4)
+    parser.add_argument("--linhas", type=int, default=50_000, help="linhas por aba da planilha sintética")
+    parser.add_argument("--config", action="append", choices=list(CONFIGURACOES),
+                        help="configurações a medir (padrão: todas)")
+    parser.add_argument("--repeticoes", type=int, default=1,
+                        help="execuções por configuração, fica a melhor (use 3 ou mais ao comparar com --base)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--base", help="resultados anteriores (--json) para comparar")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="agitel_bench_")
+    caminho = args.arquivo
+    if not caminho:
+        caminho = os.path.join(pasta, "agitel_sintetica.xlsx")
+        inicio = time.perf_counter()
+        total = gerar_planilha(caminho, args.abas, args.linhas)
+        print(f"Planilha sintética: {args.abas} abas, {total} linhas ({time.perf_counter() - inicio:.1f}s para gerar)")
+
+    resultados = {}
+    try:
+        for nome in args.config or list(CONFIGURACOES):
+            resultados[nome] = medir(caminho, CONFIGURACOES[nome], args.repeticoes)
+            print(_formatar(nome, resultados[nome]))
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        print(f"Comparação com {os.path.basename(args.base)}:")
+        if comparar(resultados, base):
+            sys.exit(1)
@@ -0,0 +1,101 @@
+import os
+import sys
+import random
+from datetime import datetime, time as dt_time, timedelta
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.LeituraAgitel import MAPEAMENTO_COLUNAS, COLUNAS_ENTRADA
+
+SERVICOS = ["Local", "DDD", "Celular", "DDI"]
+REGIOES = ["Fixo Local", "Movel VC1", "Móvel VC2", "LDN Fixo", "FIXO", "", " "]
+VALORES = ["R$ 0,12", "R$ 0,50", "R$ 1,05", "R$ 1.234,56", "R$ -2,00", "0,33", 0.33, 1.2]
+
+
+# Títulos que o LeitorAgitel reconhece como cabeçalho (a detecção exige o nome
+# canônico, sem acento e caixa, dos campos essenciais)
+TITULOS_ESSENCIAIS = {
+    'data': ["Data", "DATA"],
+    'origem': ["Origem", "ORIGEM"],
+    'destino': ["Destino", "DESTINO"],
+    'duracao': ["Duração", "Duracao", "DURAÇÃO"],
+    'preco': ["Preço", "Preco", "PREÇO"],
+}
+
+
+def _cabecalho(rnd):
+    """Um título por campo: variações do nome canônico nos essenciais e qualquer alias do MAPEAMENTO_COLUNAS nos demais."""
+    titulos = []
+    for campo in COLUNAS_ENTRADA:
+        if campo in TITULOS_ESSENCIAIS:
+            titulos.append(rnd.choice(TITULOS_ESSENCIAIS[campo]))
+        else:
+            titulo = rnd.choice(MAPEAMENTO_COLUNAS[campo])
+            titulos.append(rnd.choice([titulo, titulo.capitalize(), titulo.upper()]))
+    return titulos
+
+
+def _linha(rnd, inicio):
+    minuto, segundo = rnd.randint(0, 59), rnd.randint(0, 59)
+    hora = 1 if rnd.random() < 0.02 else 0
+    duracao = dt_time(hora, minuto, segundo) if rnd.random() < 0.5 else f"{hora:02d}:{minuto:02d}:{segundo:02d}"
+    data = inicio + timedelta(seconds=rnd.randint(0, 31 * 86400))
+    return [
+        data if rnd.random() < 0.9 else data.strftime("%d/%m/%Y %H:%M:%S"),
+        str(rnd.randint(200, 260)),
+        rnd.choice(SERVICOS),
+        rnd.choice(REGIOES),
+        str(rnd.randint(10**9, 10**10)),
+        duracao,
+        rnd.choice(VALORES),
+    ]
+
+
+def gerar_planilha(caminho, abas=3, linhas_por_aba=10_000, seed=42, resumo=True, inicio=datetime(2024, 1, 1)):
+    """
+    Gera uma planilha no formato exportado pela Agitel: aba "Resumo" opcional
+    na frente, e em cada aba algumas linhas de título antes do cabeçalho, que
+    usa aliases variados das colunas. As durações misturam time e texto, e
+    os valores misturam números e textos em reais. Algumas linhas vêm vazias.
+    Retorna o total de linhas de dados geradas.
+    """
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    if resumo:
+        aba = wb.create_sheet("Resumo")
+        aba.append(["Resumo de chamadas"])
+        aba.append(["Total de abas", abas])
+
+    total = 0
+    for numero in range(1, abas + 1):
+        aba = wb.create_sheet(f"Ramais {numero}")
+        aba.append(["Relatório de Chamadas - Agitel"])
+        for _ in range(rnd.randint(0, 3)):
+            aba.append([f"Período: {inicio:%d/%m/%Y}"])
+        colunas = list(range(len(COLUNAS_ENTRADA)))
+        # Algumas abas trazem as colunas em outra ordem e uma coluna extra no início
+        if rnd.random() < 0.3:
+            rnd.shuffle(colunas)
+        extra = [None] if rnd.random() < 0.3 else []
+        cabecalho = _cabecalho(rnd)
+        aba.append(extra + [cabecalho[indice] for indice in colunas])
+
+        for _ in range(linhas_por_aba):
+            if rnd.random() < 0.005:
+                aba.append([])
+                continue
+            linha = _linha(rnd, inicio)
+            aba.append(extra + [linha[indice] for indice in colunas])
+            total += 1
+
+    wb.save(caminho)
+    return total
+
+
+if __name__ == "__main__":
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "agitel_sintetica.xlsx"
+    abas = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    linhas = int(sys.argv[3]) if len(sys.argv) > 3 else 10_000
+    total = gerar_planilha(caminho, abas, linhas)
+    print(f"{caminho}: {abas} abas, {total} linhas de chamadas")
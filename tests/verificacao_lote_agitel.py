@@ -0,0 +1,69 @@
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtCore import QCoreApplication
+from openpyxl import load_workbook
+from gerador_planilhas_agitel import gerar_planilha
+from services.ProcessamentoLoteAgitel import ProcessadorLoteAgitel
+from utils.callStore import BaseChamadas
+
+
+def processar_pasta(pasta, **opcoes):
+    """Roda o modo pasta e retorna (mensagem de conclusão, erros, log)."""
+    processador = ProcessadorLoteAgitel(pasta, True, **opcoes)
+    concluido, erros, log = [], [], []
+    processador.processFinished.connect(concluido.append)
+    processador.errorOccurred.connect(erros.append)
+    processador.logUpdated.connect(log.append)
+    processador.run()
+    return (concluido[0] if concluido else None), erros, log
+
+
+def verificar_combinada_com_base(pasta):
+    """Saída combinada e base de consultas juntas: cada chamada vai uma vez para a base e a saída é gerada."""
+    base = os.path.join(pasta, "consultas.db")
+    mensagem, erros, _ = processar_pasta(pasta, combine=True, store_path=base)
+    assert not erros, erros
+    assert "Saída combinada" in mensagem, mensagem
+
+    saida = os.path.join(pasta, f"{os.path.basename(pasta)}_leitura_agitel.xlsx")
+    wb = load_workbook(saida, read_only=True)
+    linhas_saida = sum(1 for _ in wb.active.iter_rows(min_row=2))
+    wb.close()
+    with BaseChamadas(base) as chamadas:
+        linhas_base = chamadas.contar()
+    assert linhas_base == linhas_saida, (linhas_base, linhas_saida)
+    print(f"combinada + base: {linhas_saida} chamadas na saída e na base")
+
+
+def verificar_pastas_com_mesmo_nome(pasta):
+    """Arquivos de mesmo nome em pastas diferentes não substituem as linhas um do outro na base."""
+    base = os.path.join(pasta, "consultas_pastas.db")
+    copia = os.path.join(pasta, "copia")
+    os.makedirs(copia)
+    shutil.copy(os.path.join(pasta, "filial0.xlsx"), copia)
+    for origem in [pasta, copia]:
+        _, erros, _ = processar_pasta(origem, store_path=base)
+        assert not erros, erros
+    with BaseChamadas(base) as chamadas:
+        arquivo = os.path.join(os.path.abspath(pasta), "filial0.xlsx")
+        copiado = os.path.join(os.path.abspath(copia), "filial0.xlsx")
+        linhas, linhas_copia = chamadas.contar(arquivo=arquivo), chamadas.contar(arquivo=copiado)
+    assert linhas and linhas == linhas_copia, (linhas, linhas_copia)
+    print(f"mesmo nome em duas pastas: {linhas} chamadas de cada uma na base")
+
+
+if __name__ == "__main__":
+    app = QCoreApplication.instance() or QCoreApplication([])
+    pasta = tempfile.mkdtemp(prefix="agitel_lote_")
+    try:
+        for numero in range(3):
+            gerar_planilha(os.path.join(pasta, f"filial{numero}.xlsx"), abas=2, linhas_por_aba=2_000, seed=numero)
+        verificar_combinada_com_base(pasta)
+        verificar_pastas_com_mesmo_nome(pasta)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
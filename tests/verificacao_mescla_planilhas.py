@@ -0,0 +1,53 @@
+import os
+import sys
+import shutil
+import tempfile
+from openpyxl import Workbook, load_workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtCore import QCoreApplication
+from services.MesclaPlanilhas import PlanilhaMesclagemWorker
+
+
+def gerar_planilha(caminho, cabecalho, linhas):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(cabecalho)
+    for linha in linhas:
+        ws.append(linha)
+    wb.save(caminho)
+    return caminho
+
+
+def mesclar(arquivos, pasta, colunas, **opcoes):
+    """Roda a mesclagem e retorna as linhas da saída (cabeçalho incluído)."""
+    worker = PlanilhaMesclagemWorker(arquivos, pasta, "mesclada", colunas, **opcoes)
+    erros = []
+    worker.erro.connect(erros.append)
+    worker.executar_mesclagem()
+    assert not erros, erros
+    wb = load_workbook(worker.caminho_saida, read_only=True)
+    linhas = [list(linha) for linha in wb.active.iter_rows(values_only=True)]
+    wb.close()
+    return linhas
+
+
+def verificar_coluna_sem_nome(pasta):
+    """Coluna selecionada sem título no base: o cabeçalho sai vazio, mas os valores de todos os arquivos ficam."""
+    base = gerar_planilha(os.path.join(pasta, "base.xlsx"), ["A", None, "None", "C"], [[1, "x", "p", 3]])
+    outro = gerar_planilha(os.path.join(pasta, "outro.xlsx"), ["A", None, "None", "C"], [[10, "y", "q", 30]])
+    for opcoes in [{}, {'alinhar_cabecalho': True}, {'alinhar_cabecalho': True, 'unir_colunas': True}]:
+        linhas = mesclar([base, outro], pasta, [0, 1, 2, 3], **opcoes)
+        assert linhas[0] == ["A", None, None, "C"], (opcoes, linhas[0])
+        assert linhas[1:] == [[1, "x", "p", 3], [10, "y", "q", 30]], (opcoes, linhas[1:])
+    print("coluna sem nome: valores preservados nos modos posicional e alinhado")
+
+
+if __name__ == "__main__":
+    app = QCoreApplication.instance() or QCoreApplication([])
+    pasta = tempfile.mkdtemp(prefix="mescla_verificacao_")
+    try:
+        verificar_coluna_sem_nome(pasta)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)